@@ -0,0 +1,72 @@
+"""
+Benchmarks for the numerical parts (no drawing)
+"""
+
+import numpy as np
+
+from solarkit.solar_system import Solar_System
+
+from .common import build_system
+
+
+class Orbits:
+    params = (["csv", 100, 1000], [False, True])
+    param_names = ["system", "compute_3D"]
+    
+    def setup(self, size, compute_3D):
+        self.planets = list(build_system(size).planets.values())
+    
+    def time_compute_orbit(self, size, compute_3D):
+        for planet in self.planets:
+            planet.compute_orbit(compute_3D=compute_3D)
+    
+    def peakmem_compute_orbit(self, size, compute_3D):
+        [planet.compute_orbit(compute_3D=compute_3D) for planet in self.planets]
+
+
+class Positions:
+    params = (["csv", 100, 1000], [1, 1000])
+    param_names = ["system", "times"]
+    
+    def setup(self, size, times):
+        self.planets = list(build_system(size).planets.values())
+        self.t = np.linspace(0, 100, times) if times > 1 else 12.5
+    
+    def time_compute_position(self, size, times):
+        for planet in self.planets:
+            planet.compute_position(compute_3D=True, t=self.t)
+    
+    def peakmem_compute_position(self, size, times):
+        [planet.compute_position(compute_3D=True, t=self.t) for planet in self.planets]
+
+
+class AngleVsTime:
+    # Span of time in years (number of orbits integrated grows with it)
+    params = ([10, 100, 800], [0.01, 0.25])
+    param_names = ["span", "ecc"]
+    
+    def setup(self, span, ecc):
+        self.system = Solar_System()
+        self.t = np.linspace(1, span, 1000)
+    
+    def time_compute_angle_vs_time(self, span, ecc):
+        self.system.compute_angle_vs_time(t=self.t, P=1, ecc=ecc, theta0=0)
+    
+    def peakmem_compute_angle_vs_time(self, span, ecc):
+        self.system.compute_angle_vs_time(t=self.t, P=1, ecc=ecc, theta0=0)
+
+
+class ThirdLawFit:
+    params = ["csv", 1000, 100000]
+    param_names = ["system"]
+    
+    def setup(self, size):
+        self.system = build_system(size)
+        # Build the sorted indexes outside the timed code
+        self.system.sorted_by("a")
+    
+    def time_third_law_fit(self, size):
+        self.system.third_law_fit()
+    
+    def peakmem_third_law_fit(self, size):
+        self.system.third_law_fit()
@@ -0,0 +1,55 @@
+"""
+Cold start benchmarks. Each timeraw_ benchmark runs in a fresh interpreter,
+so the module cache is empty and the full import cost is measured
+"""
+
+
+def timeraw_import_solarkit():
+    """
+    Compute-only use: import the package and the core objects
+    """
+    
+    return """
+    import solarkit
+    from solarkit import Planet, Solar_System
+    """
+
+
+def timeraw_import_compute_orbit():
+    """
+    Compute-only use: import and compute an orbit and a position
+    """
+    
+    return """
+    from solarkit import Planet
+    
+    earth = Planet(name="Earth", m=1, a=1, ecc=0.02, beta=0, R=1, trot=1, P=1)
+    earth.compute_orbit(compute_3D=False)
+    earth.compute_position(compute_3D=False, t=0.5)
+    """
+
+
+def timeraw_import_viewer():
+    """
+    Rendering use: import the Viewer (pulls in matplotlib)
+    """
+    
+    return """
+    from solarkit import Viewer
+    """
+
+
+def track_heavy_modules_on_import():
+    """
+    Number of heavy dependencies (matplotlib, scipy, pandas) loaded by a bare `import solarkit`
+    """
+    
+    import subprocess
+    import sys
+    
+    code = ("import sys, solarkit; "
+            "print(sum(name in sys.modules for name in ('matplotlib', 'scipy', 'pandas')))")
+    
+    return int(subprocess.check_output([sys.executable, "-c", code]).decode().strip())
+
+track_heavy_modules_on_import.unit = "modules"
@@ -0,0 +1,73 @@
+"""
+Benchmarks for the Viewer methods (drawing and serialisation)
+"""
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+from solarkit.viewer import Viewer
+
+from .common import build_system
+
+
+class _ViewerBenchmark:
+    # Each call draws on a fresh figure, so only call it once per sample
+    number = 1
+    repeat = (3, 10, 20.0)
+    timeout = 300
+    
+    params = (["csv", 25], [False, True])
+    param_names = ["system", "compute_3D"]
+    
+    def setup(self, size, compute_3D):
+        self.viewer = Viewer(system=build_system(size), compute_3D=compute_3D)
+        self.viewer.initialise_plotter(dpi=100)
+        self.tmax = self.viewer.tmax
+        self.dt = self.viewer.dt
+    
+    def teardown(self, size, compute_3D):
+        plt.close("all")
+    
+    def reset(self):
+        # Viewer methods scale self.tmax and advance self.t
+        self.viewer.tmax = self.tmax
+        self.viewer.dt = self.dt
+        self.viewer.t = 0
+
+
+class Heliocentric(_ViewerBenchmark):
+    
+    def time_heliocentric_model(self, size, compute_3D):
+        self.reset()
+        self.viewer.heliocentric_model(origin_planet_name=self.viewer.chosen_planets[0].name)
+    
+    def peakmem_heliocentric_model(self, size, compute_3D):
+        self.reset()
+        self.viewer.heliocentric_model(origin_planet_name=self.viewer.chosen_planets[0].name)
+
+
+class Spinograph(_ViewerBenchmark):
+    
+    def time_spinograph(self, size, compute_3D):
+        self.reset()
+        self.viewer.spinograph()
+    
+    def peakmem_spinograph(self, size, compute_3D):
+        self.reset()
+        self.viewer.spinograph()
+
+
+class FigureData(_ViewerBenchmark):
+    
+    def setup(self, size, compute_3D):
+        super().setup(size, compute_3D)
+        self.viewer.system_orbits()
+    
+    def time_get_figure_data(self, size, compute_3D):
+        self.viewer.get_figure_data(dpi=100)
+    
+    def peakmem_get_figure_data(self, size, compute_3D):
+        self.viewer.get_figure_data(dpi=100)
@@ -0,0 +1,62 @@
+"""
+Shared helpers to build the systems used by the benchmarks
+"""
+
+import os
+
+import numpy as np
+
+from solarkit.planet import Planet
+from solarkit.solar_system import Solar_System
+from solarkit.utils import load_system_from_csv
+
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "planet_data.csv")
+
+
+def synthetic_system(n_planets: int, seed: int = 0) -> Solar_System:
+    """
+    Creates a system of random (but plausible) planets
+
+    Args:
+        n_planets (int): Number of planets in the system
+        seed (int): Random seed, the same seed always gives the same system
+
+    Returns:
+        Solar_System: Solar system object
+    """
+    
+    rng = np.random.default_rng(seed)
+    system = Solar_System(system_name=f"Synthetic({n_planets})")
+    
+    a = rng.uniform(0.3, 50, n_planets)
+    ecc = rng.uniform(0, 0.3, n_planets)
+    beta = rng.uniform(0, 20, n_planets)
+    
+    for i in range(n_planets):
+        system.add(Planet(name=f"Body {i}",
+                          m=1,
+                          a=a[i],
+                          ecc=ecc[i],
+                          beta=beta[i],
+                          R=1,
+                          trot=1,
+                          # Kepler's third law (years, AU)
+                          P=a[i]**1.5))
+    
+    return system
+
+
+def build_system(size) -> Solar_System:
+    """
+    Args:
+        size (str | int): "csv" to load planet_data.csv or the number of planets of a synthetic system
+
+    Returns:
+        Solar_System: Solar system object
+    """
+    
+    if size == "csv":
+        return load_system_from_csv(path=CSV_PATH)
+    
+    return synthetic_system(n_planets=size)
@@ -19,8 +19,9 @@ setup(
     description=DESCRIPTION,
     long_description_content_type="text/markdown",
     long_description=long_description,
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks*", "tests*"]),
     install_requires=["numpy", "pandas", "matplotlib", "scipy"],
+    extras_require={"parquet": ["pyarrow"], "numba": ["numba"]},
     keywords=["solar system", "space", "astrophysics", "bpho"],
     classifiers=[
         "Development Status :: 4 - Beta",
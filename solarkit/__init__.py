@@ -1,8 +1,18 @@
 from solarkit.planet import Planet
 from solarkit.solar_system import Solar_System
-from solarkit.viewer import Viewer
 
 from solarkit.utils import create_planet
 from solarkit.utils import load_system_from_csv
+from solarkit.utils import load_system_from_parquet
 from solarkit.utils import save_system
-from solarkit.utils import load_model
\ No newline at end of file
+from solarkit.utils import load_model
+
+
+def __getattr__(name: str):
+    # Viewer pulls in matplotlib, only import it when it is actually used
+    if name == "Viewer":
+        from solarkit.viewer import Viewer
+        
+        return Viewer
+    
+    raise AttributeError(f"module 'solarkit' has no attribute '{name}'")
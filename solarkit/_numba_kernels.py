@@ -0,0 +1,54 @@
+"""
+Numba versions of the kernels in solarkit.kernels (only imported when the numba backend is used)
+
+Compiled with cache=True, so the machine code is saved next to this file (or in NUMBA_CACHE_DIR)
+and later processes load it instead of compiling again.
+"""
+
+import numba
+import numpy as np
+
+
+@numba.guvectorize(["void(float32, float32, float32, float32[:], float32[:])",
+                    "void(float64, float64, float64, float64[:], float64[:])"],
+                   "(),(),()->(),()", target="parallel", nopython=True, cache=True)
+def conic_points(a, ecc, theta, x, y):
+    cos = np.cos(theta)
+    r = a * (1 - ecc * ecc) / (1 - ecc * cos)
+    x[0] = r * cos
+    y[0] = r * np.sin(theta)
+
+
+@numba.njit(parallel=True, nogil=True, cache=True)
+def simpson_cumsum(theta, ecc, blocks):
+    L = theta.shape[0]
+    out = np.empty(L, dtype=np.float64)
+
+    blocks = max(1, min(L, blocks))
+    size = (L + blocks - 1) // blocks
+    totals = np.zeros(blocks, dtype=np.float64)
+
+    # Sum every block in parallel...
+    for block in numba.prange(blocks):
+        total = 0.0
+        for i in range(block * size, min(L, (block + 1) * size)):
+            if i == 0 or i == L - 1:
+                c = 1.0
+            elif i % 2 == 1:
+                c = 4.0
+            else:
+                c = 2.0
+
+            g = 1.0 - ecc * np.cos(np.float64(theta[i]))
+            total += c / (g * g)
+            out[i] = total
+
+        totals[block] = total
+
+    # ...then add the sum of the blocks before
+    offsets = np.cumsum(totals) - totals
+    for block in numba.prange(blocks):
+        for i in range(block * size, min(L, (block + 1) * size)):
+            out[i] += offsets[block]
+
+    return out
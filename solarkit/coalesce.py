@@ -0,0 +1,137 @@
+"""
+Single-flight coalescing of identical concurrent calls
+
+While a call for a key is in flight, every other call with the same key waits for it and gets
+the same result (or exception) instead of doing the work again. Once it finishes the key is
+forgotten, so later calls compute afresh. Calls are tracked with concurrent.futures.Future,
+which works across threads and (through asyncio.wrap_future) across asyncio tasks and event loops.
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+def normalize_key(request: Dict) -> str:
+    """
+    Key of a request, equal for requests that only differ in the order of their fields
+
+    Args:
+        request (Dict): JSON-like request (e.g. a validated render request, see service.validate_request)
+
+    Returns:
+        str: The key
+    """
+
+    return json.dumps(request, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+class SingleFlight:
+    """
+    Table of in-flight calls, shared by threads and asyncio tasks
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def __len__(self) -> int:
+        """
+        Number of keys in flight
+        """
+
+        with self._lock:
+            return len(self._calls)
+
+    def _claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        The future of the call for key, and whether the caller has to do the call (no call was in flight)
+        """
+
+        with self._lock:
+            if key in self._calls:
+                return self._calls[key], False
+
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+
+            return future, True
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call fn(*args, **kwargs), or wait for the call already in flight for key
+
+        Args:
+            key (Hashable): Calls with equal keys are assumed to return the same\n
+            fn (Callable[..., Any]): The work
+
+        Returns:
+            Any: What fn returned (its exception is raised in every waiting caller)
+        """
+
+        future, leader = self._claim(key)
+
+        if leader:
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self._forget(key, future)
+
+        return future.result()
+
+    def do_future(self, key: Hashable, submit: Callable[[], Future]) -> Future:
+        """
+        Start work that already returns a Future (e.g. Executor.submit), or join the one in flight for key
+
+        Args:
+            key (Hashable): Calls with equal keys are assumed to return the same\n
+            submit (Callable[[], Future]): Starts the work
+
+        Returns:
+            Future: Shared by every caller with this key while it is in flight
+        """
+
+        with self._lock:
+            if key in self._calls:
+                return self._calls[key]
+
+            future = submit()
+            self._calls[key] = future
+
+        future.add_done_callback(lambda done: self._forget(key, done))
+
+        return future
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn(), or wait for the call already in flight for key (from any thread or event loop)
+
+        Args:
+            key (Hashable): Calls with equal keys are assumed to return the same\n
+            fn (Callable[[], Awaitable[Any]]): Returns the awaitable doing the work
+
+        Returns:
+            Any: What fn() resolved to (its exception is raised in every waiting caller)
+        """
+
+        future, leader = self._claim(key)
+
+        if leader:
+            try:
+                future.set_result(await fn())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self._forget(key, future)
+
+        return await asyncio.wrap_future(future)
@@ -0,0 +1,85 @@
+"""
+Polyline decimation, to drop vertices that would not be visible at the output resolution
+
+Points are expected in screen space (pixels), so the tolerance is in pixels.
+"""
+
+import numpy as np
+
+
+def rdp_mask(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Ramer-Douglas-Peucker simplification of a polyline
+
+    Args:
+        points (np.ndarray): Vertices, shape (n, 2)\n
+        tolerance (float): Maximum distance between the original and the simplified polyline
+
+    Returns:
+        np.ndarray: Boolean mask of shape (n,), True for the vertices to keep (first and last are always kept)
+    """
+    
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    
+    if n < 3:
+        keep[:] = True
+        return keep
+    
+    keep[0] = keep[-1] = True
+    index = np.arange(n)
+    
+    # Split every open segment at once, one level of the recursion per iteration
+    while True:
+        kept = np.flatnonzero(keep)
+        
+        # Segment each point belongs to: [kept[segment], kept[segment + 1]]
+        segment = np.minimum(np.searchsorted(kept, index, side="right") - 1, len(kept) - 2)
+        start = points[kept[segment]]
+        chord = points[kept[segment + 1]] - start
+        relative = points - start
+        squared = np.sum(chord**2, axis=1)
+        
+        # Distance to the segment, not the infinite line, so points that fold back past its ends are kept
+        # (and to its start for closed curves)
+        along = np.clip(np.sum(relative * chord, axis=1) / np.where(squared > 0, squared, 1), 0, 1)
+        offset = relative - along[:, None] * chord
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        distance[keep] = 0
+        
+        furthest = np.maximum.reduceat(distance, kept[:-1])
+        candidates = np.flatnonzero((distance > tolerance) & (distance == furthest[segment]))
+        
+        if len(candidates) == 0:
+            break
+        
+        # One split per segment
+        _, first = np.unique(segment[candidates], return_index=True)
+        keep[candidates[first]] = True
+    
+    return keep
+
+
+def cull_lines_mask(lines: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Drop lines that are drawn (almost) on top of the previous kept line
+
+    Args:
+        lines (np.ndarray): Lines, shape (number of lines, vertices per line, 2)\n
+        tolerance (float): A line is dropped if none of its vertices moved further than this from the last kept line
+
+    Returns:
+        np.ndarray: Boolean mask of shape (number of lines,), True for the lines to keep
+    """
+    
+    lines = np.asarray(lines, dtype=float)
+    keep = np.zeros(len(lines), dtype=bool)
+    
+    last = None
+    for i, line in enumerate(lines):
+        if last is None or np.hypot(*(line - last).T).max() > tolerance:
+            keep[i] = True
+            last = line
+    
+    return keep
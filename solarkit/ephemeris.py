@@ -0,0 +1,385 @@
+"""
+Vectorised ephemeris: positions of many planets at many times in one go
+
+Uses the same model as Planet.compute_position, but works on arrays of planets
+and times instead of one planet at a time. Long time spans can be evaluated in 
+fixed-size blocks (iter_position_blocks, evaluate_chunked) so memory stays bounded,
+and large (planets x times) grids can be split into tiles computed on a thread pool
+(workers argument, NumPy releases the GIL while it computes).
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from solarkit.kernels import conic_points, get_backend
+from solarkit.planet import Planet, orientation_matrices
+from solarkit.precision import DTypeLike, orbital_phase, resolve_dtype
+
+
+def orbital_elements(planets: List[Planet], dtype: Optional[DTypeLike] = None) -> Dict[str, np.ndarray]:
+    """
+    Stack the orbital elements of the planets into arrays
+
+    Args:
+        planets (List[Planet]): Planets to use\n
+        dtype (Optional[DTypeLike]): dtype of a, ecc and beta (P is always float64, see precision.orbital_phase)
+
+    Returns:
+        Dict: {a: semi-major axes, ecc: eccentricities, beta: inclinations (rad), lan: longitudes of the ascending node (rad), 
+               argp: arguments of periapsis (rad), P: periods}, each of shape (number of planets,)
+    """
+    
+    dtype = resolve_dtype(dtype)
+    
+    return {"a": np.array([planet.a for planet in planets], dtype=dtype),
+            "ecc": np.array([planet.ecc for planet in planets], dtype=dtype),
+            "beta": (np.array([planet.beta for planet in planets], dtype=float) * np.pi / 180).astype(dtype),
+            "lan": (np.array([planet.lan for planet in planets], dtype=float) * np.pi / 180).astype(dtype),
+            "argp": (np.array([planet.argp for planet in planets], dtype=float) * np.pi / 180).astype(dtype),
+            "P": np.array([planet.P for planet in planets], dtype=float)}
+
+
+def compute_positions(planets: List[Planet], t: np.ndarray, compute_3D: bool, dtype: Optional[DTypeLike] = None, workers: Optional[int] = 1) -> np.ndarray:
+    """
+    Compute the positions of every planet at every time
+
+    Args:
+        planets (List[Planet]): Planets to use\n
+        t (np.ndarray): Times (years)\n
+        compute_3D (bool): Compute the positions in 3D using beta (inclination), lan and argp\n
+        dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)\n
+        workers (Optional[int]): Threads to split large grids over (None for one per CPU). Defaults to 1
+
+    Returns:
+        np.ndarray: Array of shape (2 or 3, number of planets, len(t)), so x, y(, z) = compute_positions(...)
+    """
+    
+    dtype = resolve_dtype(dtype)
+    t = np.atleast_1d(np.asarray(t, dtype=float))
+    elements = orbital_elements(planets, dtype=dtype)
+    
+    if workers == 1:
+        return positions_from_elements(elements=elements, t=t, compute_3D=compute_3D, dtype=dtype)
+    
+    return positions_threaded(elements=elements, t=t, compute_3D=compute_3D, dtype=dtype, workers=workers)
+
+
+def place_on_orbits(elements: Dict[str, np.ndarray], theta: np.ndarray, compute_3D: bool) -> np.ndarray:
+    """
+    Points at polar angles theta of the orbits described by elements
+    
+    Elements can have any shape (e.g. (planets,) or (variants, planets)), theta must broadcast 
+    against that shape with one more axis at the end (the samples).
+
+    Args:
+        elements (Dict[str, np.ndarray]): a, ecc, beta, lan and argp arrays (see orbital_elements)\n
+        theta (np.ndarray): Polar angles (rad), shape (*elements shape, samples) or (samples,)\n
+        compute_3D (bool): Compute the points in 3D using beta (inclination), lan and argp
+
+    Returns:
+        np.ndarray: Array of shape (2 or 3, *elements shape, samples)
+    """
+    
+    x, y = conic_points(elements["a"][..., None], elements["ecc"][..., None], theta)
+    
+    # One rotation per orbit, applied to all of its points at once (z = 0 in the orbital plane)
+    rotations = orientation_matrices(beta=elements["beta"], lan=elements["lan"], argp=elements["argp"], compute_3D=compute_3D)[..., :2]
+    
+    return np.einsum("...ij,j...t->i...t", rotations, np.stack(np.broadcast_arrays(x, y)))
+
+
+def positions_from_elements(elements: Dict[str, np.ndarray], t: np.ndarray, compute_3D: bool, dtype: Optional[DTypeLike] = None) -> np.ndarray:
+    """
+    Positions at times t of the orbits described by elements (same as compute_positions, but from arrays)
+
+    Args:
+        elements (Dict[str, np.ndarray]): a, ecc, beta, lan, argp and P arrays of any (matching) shape (see orbital_elements)\n
+        t (np.ndarray): Times (years), shape (times,)\n
+        compute_3D (bool): Compute the positions in 3D using beta (inclination), lan and argp\n
+        dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)
+
+    Returns:
+        np.ndarray: Array of shape (2 or 3, *elements shape, times)
+    """
+    
+    theta = orbital_phase(t=t, P=elements["P"][..., None], dtype=resolve_dtype(dtype))
+    
+    return place_on_orbits(elements=elements, theta=theta, compute_3D=compute_3D)
+
+
+# Planets x times per tile of positions_threaded: large enough to amortise scheduling,
+# small enough for a tile's temporaries to stay in cache
+MIN_TILE = 16384
+MAX_TILE = 262144
+
+_pools: Dict[int, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _thread_pool(workers: int) -> ThreadPoolExecutor:
+    """
+    Shared pool with this many threads (created the first time it is needed)
+    """
+    
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="solarkit-ephemeris")
+        
+        return _pools[workers]
+
+
+def tile_shape(n_planets: int, n_times: int, workers: int) -> Tuple[int, int]:
+    """
+    Planets and times per tile for a (n_planets x n_times) grid: about 4 tiles per worker, 
+    kept between MIN_TILE and MAX_TILE elements, split along time first (contiguous in memory)
+
+    Args:
+        n_planets (int): Number of planets\n
+        n_times (int): Number of times\n
+        workers (int): Number of threads
+
+    Returns:
+        Tuple[int, int]: (planets per tile, times per tile)
+    """
+    
+    target = int(np.clip(n_planets * n_times // (4 * workers), MIN_TILE, MAX_TILE))
+    
+    times = min(n_times, max(256, target // max(n_planets, 1)))
+    planets = min(n_planets, max(1, target // times))
+    
+    return planets, times
+
+
+def positions_threaded(elements: Dict[str, np.ndarray], t: np.ndarray, compute_3D: bool, dtype: Optional[DTypeLike] = None, workers: Optional[int] = None) -> np.ndarray:
+    """
+    positions_from_elements for 1D elements, split into (planets x times) tiles computed on a thread pool (see tile_shape)
+    
+    Grids too small to be worth splitting are computed in the calling thread. With the numba kernel backend
+    (see solarkit.kernels) only the NumPy stages (orbital phase and rotation) are tiled: the conic kernel
+    already runs in parallel and is called once from this thread, since calling it from several threads
+    would nest parallel regions (which the workqueue layer aborts on) and oversubscribe the cores
+
+    Args:
+        elements (Dict[str, np.ndarray]): a, ecc, beta, lan, argp and P arrays of shape (planets,) (see orbital_elements)\n
+        t (np.ndarray): Times (years), shape (times,)\n
+        compute_3D (bool): Compute the positions in 3D using beta (inclination), lan and argp\n
+        dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)\n
+        workers (Optional[int]): Threads (None for one per CPU)
+
+    Returns:
+        np.ndarray: Array of shape (2 or 3, planets, times)
+    """
+    
+    dtype = resolve_dtype(dtype)
+    workers = workers or os.cpu_count() or 1
+    n_planets, n_times = len(elements["P"]), len(t)
+    
+    if workers == 1 or n_planets * n_times < 2 * MIN_TILE:
+        return positions_from_elements(elements=elements, t=t, compute_3D=compute_3D, dtype=dtype)
+    
+    planets_per_tile, times_per_tile = tile_shape(n_planets, n_times, workers)
+    positions = np.empty((3 if compute_3D else 2, n_planets, n_times), dtype=dtype)
+    pool = _thread_pool(workers)
+    
+    def for_each_tile(compute_tile: Callable[[slice, slice], None]) -> None:
+        tiles = [pool.submit(compute_tile, slice(i, i + planets_per_tile), slice(j, j + times_per_tile))
+                 for i in range(0, n_planets, planets_per_tile) for j in range(0, n_times, times_per_tile)]
+        
+        for tile in tiles:
+            tile.result()
+    
+    if get_backend() != "numba":
+        def compute_tile(planets: slice, times: slice) -> None:
+            tile = {key: value[planets] for key, value in elements.items()}
+            positions[:, planets, times] = positions_from_elements(elements=tile, t=t[times], compute_3D=compute_3D, dtype=dtype)
+        
+        for_each_tile(compute_tile)
+        return positions
+    
+    theta = np.empty((n_planets, n_times), dtype=dtype)
+    
+    def phase_tile(planets: slice, times: slice) -> None:
+        theta[planets, times] = orbital_phase(t=t[times], P=elements["P"][planets, None], dtype=dtype)
+    
+    for_each_tile(phase_tile)
+    
+    # Whole grid at once, the kernel is parallel itself
+    x, y = conic_points(elements["a"][:, None], elements["ecc"][:, None], theta)
+    rotations = orientation_matrices(beta=elements["beta"], lan=elements["lan"], argp=elements["argp"], compute_3D=compute_3D)[..., :2]
+    
+    def rotate_tile(planets: slice, times: slice) -> None:
+        positions[:, planets, times] = np.einsum("pij,jpt->ipt", rotations[planets], np.stack([x[planets, times], y[planets, times]]))
+    
+    for_each_tile(rotate_tile)
+    
+    return positions
+
+
+# Times per block, (3, 10 planets, 65536) float64 positions is ~15 MB
+DEFAULT_BLOCK_SIZE = 65536
+
+
+def iter_position_blocks(planets: List[Planet], t_start: float, dt: float, num_points: int, compute_3D: bool, origin: Optional[Planet] = None, block_size: int = DEFAULT_BLOCK_SIZE, dtype: Optional[DTypeLike] = None, workers: Optional[int] = 1) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Evaluate the positions at t_start + dt * i (i = 0 ... num_points - 1), block_size times at a time
+
+    Args:
+        planets (List[Planet]): Planets to use\n
+        t_start (float): First time (years)\n
+        dt (float): Time step (years)\n
+        num_points (int): Number of times\n
+        compute_3D (bool): Compute the positions using beta (inclination)\n
+        origin (Optional[Planet]): Compute the positions relative to this planet (leave blank for the Sun)\n
+        block_size (int): Times per block. Defaults to DEFAULT_BLOCK_SIZE\n
+        dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)\n
+        workers (Optional[int]): Threads to compute each block with (None for one per CPU). Defaults to 1
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: Times of the block and positions of shape (2 or 3, number of planets, times in block)
+    """
+    
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    
+    for start in range(0, num_points, block_size):
+        # Times from the index, so there is no drift from adding dt over and over
+        t = t_start + dt * np.arange(start, min(start + block_size, num_points))
+        positions = compute_positions(planets=planets, t=t, compute_3D=compute_3D, dtype=dtype, workers=workers)
+        
+        if origin is not None:
+            positions -= compute_positions(planets=[origin], t=t, compute_3D=compute_3D, dtype=dtype)
+        
+        yield t, positions
+
+
+def evaluate_chunked(planets: List[Planet], t_start: float, dt: float, num_points: int, consumer: Callable[[np.ndarray, np.ndarray], None], compute_3D: bool, origin: Optional[Planet] = None, block_size: int = DEFAULT_BLOCK_SIZE, dtype: Optional[DTypeLike] = None, workers: Optional[int] = 1):
+    """
+    Feed every block of iter_position_blocks to consumer, so only one block is in memory at a time
+
+    Args:
+        planets (List[Planet]): Planets to use\n
+        t_start (float): First time (years)\n
+        dt (float): Time step (years)\n
+        num_points (int): Number of times\n
+        consumer (Callable[[np.ndarray, np.ndarray], None]): Called with (times, positions) for every block (e.g. CurveCollector, ExtentReducer, export.FrameWriter)\n
+        compute_3D (bool): Compute the positions using beta (inclination)\n
+        origin (Optional[Planet]): Compute the positions relative to this planet (leave blank for the Sun)\n
+        block_size (int): Times per block. Defaults to DEFAULT_BLOCK_SIZE\n
+        dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)\n
+        workers (Optional[int]): Threads to compute each block with (None for one per CPU). Defaults to 1
+
+    Returns:
+        consumer.result() if the consumer has a result method, else None
+    """
+    
+    for t, positions in iter_position_blocks(planets=planets, t_start=t_start, dt=dt, num_points=num_points, compute_3D=compute_3D, origin=origin, block_size=block_size, dtype=dtype, workers=workers):
+        consumer(t, positions)
+    
+    if hasattr(consumer, "result"):
+        return consumer.result()
+
+
+class CurveCollector:
+    """
+    Consumer that joins the blocks into one curve per planet
+    
+    Args:
+        simplify (Optional[Callable]): Called with the coordinates of a planet in a block (x, y[, z]), returns 
+        them with the redundant points removed. Simplifying block by block keeps memory proportional to 
+        what is drawn instead of to the number of points
+    """
+    
+    def __init__(self, simplify: Optional[Callable[..., Tuple[np.ndarray, ...]]] = None) -> None:
+        self.simplify = simplify
+        self.blocks: List[List[Tuple[np.ndarray, ...]]] = []
+    
+    def __call__(self, t: np.ndarray, positions: np.ndarray) -> None:
+        if not self.blocks:
+            self.blocks = [[] for _ in range(positions.shape[1])]
+        
+        for planet_blocks, coords in zip(self.blocks, positions.transpose(1, 0, 2)):
+            coords = tuple(coords)
+            
+            if self.simplify is not None:
+                coords = self.simplify(*coords)
+            
+            # Copy so the block array can be freed
+            planet_blocks.append(tuple(np.array(c) for c in coords))
+    
+    def result(self) -> List[Tuple[np.ndarray, ...]]:
+        """
+        Returns:
+            List[Tuple[np.ndarray, ...]]: (x, y[, z]) of every planet
+        """
+        
+        return [tuple(np.concatenate(c) for c in zip(*planet_blocks)) for planet_blocks in self.blocks]
+
+
+class ExtentReducer:
+    """
+    Consumer that only keeps the bounding box of every planet's path
+    """
+    
+    def __init__(self) -> None:
+        self.low: Optional[np.ndarray] = None
+        self.high: Optional[np.ndarray] = None
+    
+    def __call__(self, t: np.ndarray, positions: np.ndarray) -> None:
+        low = positions.min(axis=2)
+        high = positions.max(axis=2)
+        
+        self.low = low if self.low is None else np.minimum(self.low, low)
+        self.high = high if self.high is None else np.maximum(self.high, high)
+    
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Minimum and maximum, each of shape (2 or 3, number of planets)
+        """
+        
+        return self.low, self.high
+
+
+class DensityRaster:
+    """
+    Consumer that bins x and y of every point into a fixed 2D histogram
+    
+    Memory and drawing cost depend on the number of bins, not on the number of planets or points
+    
+    Args:
+        extent (Tuple[float, float, float, float]): xmin, xmax, ymin, ymax of the raster (points outside are dropped)\n
+        bins (int): Bins per axis. Defaults to 512
+    """
+    
+    def __init__(self, extent: Tuple[float, float, float, float], bins: int = 512) -> None:
+        self.extent = tuple(float(e) for e in extent)
+        self.bins = bins
+        self.counts = np.zeros((bins, bins), dtype=np.int64)
+    
+    def add(self, x: np.ndarray, y: np.ndarray) -> None:
+        """
+        Bin more points
+
+        Args:
+            x (np.ndarray): Points on x-axis\n
+            y (np.ndarray): Points on y-axis
+        """
+        
+        xmin, xmax, ymin, ymax = self.extent
+        counts, _, _ = np.histogram2d(np.ravel(x), np.ravel(y), bins=self.bins, range=[[xmin, xmax], [ymin, ymax]])
+        self.counts += counts.astype(np.int64)
+    
+    def __call__(self, t: np.ndarray, positions: np.ndarray) -> None:
+        self.add(positions[0], positions[1])
+    
+    def result(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Counts, shape (bins, bins), indexed [x bin, y bin]
+        """
+        
+        return self.counts
@@ -0,0 +1,163 @@
+"""
+Pack computed geometry into a compact binary buffer (little-endian float32) 
+plus a small JSON manifest, so it can be drawn client side (e.g. WebGL)
+"""
+
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+DTYPE = np.dtype("<f4")
+
+
+def pack_geometry(layers: Dict[str, List[Dict]], dims: int) -> Tuple[bytes, Dict]:
+    """
+    Pack layers of geometry into one buffer
+
+    Args:
+        layers (Dict[str, List[Dict]]): {layer name: list of items}. Each item is a dict {name: item name,
+                c: colour,
+                x: array of points on x-axis,
+                y: array of points on y-axis,
+                z: array of points on z-axis (only if dims == 3),
+                primitive (optional): how to draw the vertices, defaults to "line_strip",
+                stride (optional): vertices per polyline for "line_strips"}\n
+        dims (int): 2 or 3
+        
+    x, y (and z) may be 2D arrays of shape (lines, stride), in that case each row is a separate polyline 
+    with `stride` vertices.
+
+    Returns:
+        Tuple[bytes, Dict]: The buffer and its manifest. For every item the manifest holds its name, colour, 
+        byte offset into the buffer and vertex count. Vertices are interleaved (x, y[, z]).
+    """
+    
+    axes = ["x", "y", "z"][:dims]
+    
+    chunks = []
+    offset = 0
+    manifest = {"version": 1,
+                "dtype": "float32",
+                "byte_order": "little",
+                "dims": dims,
+                "layers": {}}
+    
+    for layer_name, items in layers.items():
+        entries = []
+        
+        for item in items:
+            coords = [np.asarray(item[axis]) for axis in axes]
+            
+            # Interleave as (x, y[, z]) per vertex
+            vertices = np.ascontiguousarray(np.stack([c.reshape(-1) for c in coords], axis=1), dtype=DTYPE)
+            data = vertices.tobytes()
+            
+            entry = {"name": item["name"],
+                     "colour": item["c"],
+                     "offset": offset,
+                     "count": len(vertices),
+                     "primitive": item.get("primitive", "line_strip")}
+            
+            if coords[0].ndim == 2:
+                entry["primitive"] = "line_strips"
+                entry["stride"] = coords[0].shape[1]
+                
+            entries.append(entry)
+            chunks.append(data)
+            offset += len(data)
+        
+        manifest["layers"][layer_name] = entries
+    
+    manifest["byte_length"] = offset
+    
+    return b"".join(chunks), manifest
+
+
+def write_geometry(buffer: bytes, manifest: Dict, path: str, filename: str) -> None:
+    """
+    Write a packed buffer to {path}/{filename}.bin and its manifest to {path}/{filename}.json
+
+    Args:
+        buffer (bytes): Packed geometry (from pack_geometry)\n
+        manifest (Dict): Its manifest (from pack_geometry)\n
+        path (str): Directory where the files will be stored\n
+        filename (str): Name of the files (without extension)
+    """
+    
+    if not os.path.exists(path):
+        os.mkdir(path)
+    
+    manifest = dict(manifest, buffer=f"{filename}.bin")
+    
+    with open(os.path.join(path, f"{filename}.bin"), "wb") as f:
+        f.write(buffer)
+    
+    with open(os.path.join(path, f"{filename}.json"), "w") as f:
+        json.dump(manifest, f)
+
+
+class FrameWriter:
+    """
+    Consumer for ephemeris.evaluate_chunked that streams every block straight to disk
+    
+    Positions are appended to {path}/{filename}.bin as little-endian float32 with layout 
+    (frames, planets, dims), so the file can be read back as one array. result() closes the 
+    file and writes the manifest to {path}/{filename}.json
+    
+    Args:
+        path (str): Directory where the files will be stored\n
+        filename (str): Name of the files (without extension)\n
+        names (List[str]): Planet names, in the order they are evaluated\n
+        colours (List[str]): Planet colours, in the same order
+    """
+    
+    def __init__(self, path: str, filename: str, names: List[str], colours: List[str]) -> None:
+        if not os.path.exists(path):
+            os.mkdir(path)
+        
+        self.path = path
+        self.filename = filename
+        self.names = names
+        self.colours = colours
+        
+        self.file = open(os.path.join(path, f"{filename}.bin"), "wb")
+        self.frames = 0
+        self.dims = 0
+        self.t_start = None
+        self.t_end = None
+    
+    def __call__(self, t: np.ndarray, positions: np.ndarray) -> None:
+        self.file.write(np.ascontiguousarray(positions.transpose(2, 1, 0), dtype=DTYPE).tobytes())
+        
+        if self.t_start is None:
+            self.t_start = float(t[0])
+        self.t_end = float(t[-1])
+        self.frames += len(t)
+        self.dims = positions.shape[0]
+    
+    def result(self) -> Dict:
+        """
+        Returns:
+            Dict: The manifest
+        """
+        
+        self.file.close()
+        
+        manifest = {"version": 1,
+                    "dtype": "float32",
+                    "byte_order": "little",
+                    "dims": self.dims,
+                    "layout": ["frames", "planets", "dims"],
+                    "frames": self.frames,
+                    "t_start": self.t_start,
+                    "t_end": self.t_end,
+                    "planets": [{"name": name, "colour": colour} for name, colour in zip(self.names, self.colours)],
+                    "buffer": f"{self.filename}.bin"}
+        
+        with open(os.path.join(self.path, f"{self.filename}.json"), "w") as f:
+            json.dump(manifest, f)
+        
+        return manifest
@@ -0,0 +1,184 @@
+"""
+Lightweight timing spans
+
+Wrap a phase of work in `with span("name"):` and, if a sink has been set with set_sink(), 
+the time it took is reported to it. When no sink is set, span() returns a shared no-op 
+context manager, so leaving the spans in the code costs close to nothing.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict
+
+
+class _NullSpan:
+    """
+    Does nothing, used when instrumentation is disabled
+    """
+    
+    __slots__ = ()
+    
+    def __enter__(self) -> None:
+        return None
+    
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+class _Span:
+    """
+    Times the code inside the with block and reports it to a sink
+    """
+    
+    __slots__ = ("name", "sink", "start")
+    
+    def __init__(self, name: str, sink) -> None:
+        self.name = name
+        self.sink = sink
+        
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+    
+    def __exit__(self, *exc) -> bool:
+        self.sink.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_sink = None
+
+
+def span(name: str):
+    """
+    Time a phase of work (use as a context manager)
+
+    Args:
+        name (str): Span name, e.g. "viewer.heliocentric_model.compute"
+
+    Returns:
+        A context manager
+    """
+    
+    if _sink is None:
+        return _NULL_SPAN
+    
+    return _Span(name, _sink)
+
+
+def set_sink(sink) -> None:
+    """
+    Set where spans are reported to. Call with None to disable instrumentation
+
+    Args:
+        sink: Any object with a record(name: str, seconds: float) method (LoggingSink, CallbackSink, CollectorSink) or a plain callable taking (name, seconds)
+    """
+    
+    global _sink
+    
+    if sink is not None and not hasattr(sink, "record"):
+        sink = CallbackSink(callback=sink)
+    
+    _sink = sink
+
+
+def get_sink():
+    """
+    Returns:
+        The current sink (None when instrumentation is disabled)
+    """
+    
+    return _sink
+
+
+@dataclass
+class LoggingSink:
+    """
+    Logs every span
+
+    Args:
+        logger (logging.Logger): Logger to use. Defaults to the "solarkit" logger\n
+        level (int): Logging level. Defaults to logging.DEBUG
+    """
+    
+    logger: logging.Logger = field(default_factory=lambda: logging.getLogger("solarkit"))
+    level: int = field(default=logging.DEBUG)
+    
+    def record(self, name: str, seconds: float) -> None:
+        self.logger.log(self.level, "%s took %.6fs", name, seconds)
+
+
+@dataclass
+class CallbackSink:
+    """
+    Calls a function with every span
+
+    Args:
+        callback (Callable[[str, float], None]): Called with (span name, seconds)
+    """
+    
+    callback: Callable[[str, float], None]
+    
+    def record(self, name: str, seconds: float) -> None:
+        self.callback(name, seconds)
+
+
+@dataclass
+class CollectorSink:
+    """
+    Aggregates spans (count, total and max time per span name), Prometheus summary style.
+    Safe to share between threads
+    """
+    
+    counts: Dict[str, int] = field(init=False, default_factory=dict)
+    totals: Dict[str, float] = field(init=False, default_factory=dict)
+    maxima: Dict[str, float] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+    
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            self.maxima[name] = max(self.maxima.get(name, 0.0), seconds)
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns:
+            Dict: {span name: {count: number of times, sum: total seconds, max: longest time (seconds)}}
+        """
+        
+        with self._lock:
+            return {name: {"count": self.counts[name],
+                           "sum": self.totals[name],
+                           "max": self.maxima[name]} for name in self.counts}
+    
+    def reset(self) -> None:
+        """
+        Forget all recorded spans
+        """
+        
+        with self._lock:
+            self.counts.clear()
+            self.totals.clear()
+            self.maxima.clear()
+    
+    def to_prometheus(self, metric_name: str = "solarkit_span_seconds") -> str:
+        """
+        Export the collected spans in the Prometheus text format
+
+        Args:
+            metric_name (str): Name of the metric. Defaults to "solarkit_span_seconds".
+
+        Returns:
+            str: The metrics, ready to be served on a /metrics endpoint
+        """
+        
+        lines = [f"# TYPE {metric_name} summary"]
+        for name, stats in sorted(self.snapshot().items()):
+            # Label values escape backslash, double quote and line feed
+            label = name.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            lines.append(f'{metric_name}_count{{span="{label}"}} {stats["count"]}')
+            lines.append(f'{metric_name}_sum{{span="{label}"}} {stats["sum"]:.9f}')
+        
+        return "\n".join(lines) + "\n"
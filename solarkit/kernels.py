@@ -0,0 +1,201 @@
+"""
+Compute kernels with interchangeable backends
+
+The inner loops of the geometry pipeline (points on a conic orbit, and the Simpson sum of
+compute_angle_vs_time) have a NumPy implementation and a Numba one, compiled with parallel
+loops over bodies and times. The Numba backend is used when Numba is installed ("auto"), or the
+backend can be chosen with set_backend() or the SOLARKIT_BACKEND environment variable
+("auto", "numpy" or "numba").
+
+The Numba kernels (solarkit._numba_kernels) are cached on disk, so only the first process on a
+machine compiles them; later ones load them, which still takes about half a second, so worker
+processes load them up front with warm_up(). Numba's thread pool does not survive fork(), so
+process pools are started with process_context().
+
+Small inputs (fewer than MIN_JIT_SIZE elements) always use NumPy, where thread start-up would
+cost more than it saves. The backends agree to a few epsilon of the dtype: Numba evaluates
+the Simpson integrand in float64 and sums it block by block, so the rounding differs slightly.
+"""
+
+import multiprocessing
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+BACKENDS = ("numpy", "numba")
+
+# Elements below which NumPy is used whatever the backend
+MIN_JIT_SIZE = 16384
+
+_backend: Optional[str] = None
+
+# Whether this process has loaded (and so run) the Numba kernels, see process_context
+_jit_loaded = False
+
+
+def available_backends() -> Tuple[str, ...]:
+    """
+    Returns:
+        Tuple[str, ...]: The backends that can be used here
+    """
+
+    try:
+        import numba  # noqa: F401
+    except ImportError:
+        return ("numpy",)
+
+    return BACKENDS
+
+
+def set_backend(backend: str = "auto") -> None:
+    """
+    Choose the kernel backend
+
+    Args:
+        backend (str): "numpy", "numba" or "auto" (numba if installed). Defaults to "auto"
+
+    Raises:
+        ValueError: Unknown backend
+        ImportError: "numba" was asked for but it is not installed
+    """
+
+    global _backend
+
+    if backend == "auto":
+        _backend = available_backends()[-1]
+        return
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, choose from {BACKENDS + ('auto',)}")
+
+    if backend not in available_backends():
+        raise ImportError(f"{backend} is not installed")
+
+    _backend = backend
+
+
+def get_backend() -> str:
+    """
+    Returns:
+        str: The kernel backend in use ("numpy" or "numba")
+    """
+
+    if _backend is None:
+        set_backend(os.environ.get("SOLARKIT_BACKEND", "auto"))
+
+    return _backend
+
+
+def _use_jit(size: int) -> bool:
+    return size >= MIN_JIT_SIZE and get_backend() == "numba"
+
+
+@lru_cache(maxsize=None)
+def _numba_kernels():
+    """
+    Load the Numba kernels (compiled the first time, then loaded from numba's on-disk cache)
+    """
+
+    from solarkit import _numba_kernels
+
+    global _jit_loaded
+    _jit_loaded = True
+
+    return _numba_kernels.conic_points, _numba_kernels.simpson_cumsum
+
+
+def warm_up() -> None:
+    """
+    Compile (or load from the cache) the kernels of the current backend now, instead of in the first call 
+    that needs them (e.g. in a worker process initialiser)
+    """
+
+    if get_backend() != "numba":
+        return
+
+    conic, cumsum = _numba_kernels()
+    for dtype in (np.float32, np.float64):
+        one = np.ones(1, dtype=dtype)
+        conic(one, 0 * one, one)
+        cumsum(np.ones(3, dtype=dtype), 0.5, 1)
+
+
+def process_context() -> Optional[multiprocessing.context.BaseContext]:
+    """
+    Start method for worker process pools (pass it as mp_context)
+    
+    Children forked from a process that has run a parallel Numba kernel hang (the TBB and OpenMP 
+    thread pools are not fork-safe), so once this process has used the Numba kernels workers are 
+    started from a clean forkserver process instead (spawn where there is none). The main module 
+    then has to be importable without side effects (if __name__ == "__main__":)
+
+    Returns:
+        Optional[multiprocessing.context.BaseContext]: The context, None for the default
+    """
+
+    if not _jit_loaded:
+        return None
+
+    methods = multiprocessing.get_all_start_methods()
+
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def conic_points(a, ecc, theta) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Points at polar angles theta of orbits with semi-major axes a and eccentricities ecc, in their own plane
+
+    Args:
+        a (float | np.ndarray): Semi-major axes\n
+        ecc (float | np.ndarray): Eccentricities\n
+        theta (np.ndarray): Polar angles (rad), broadcast against a and ecc
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: x and y, in the dtype of theta
+    """
+
+    theta = np.asarray(theta)
+
+    if _use_jit(theta.size) and theta.dtype in (np.float32, np.float64):
+        kernel, _ = _numba_kernels()
+        return kernel(np.asarray(a, dtype=theta.dtype), np.asarray(ecc, dtype=theta.dtype), theta)
+
+    r = a * (1 - ecc**2) / (1 - ecc * np.cos(theta))
+
+    return r * np.cos(theta), r * np.sin(theta)
+
+
+def simpson_cumsum(theta: np.ndarray, ecc: float) -> np.ndarray:
+    """
+    Running Simpson's rule sum of (1 - ecc cos(theta))^-2 over equally spaced theta (see Solar_System.compute_angle_vs_time)
+
+    Args:
+        theta (np.ndarray): Equally spaced polar angles (rad)\n
+        ecc (float): Eccentricity of the orbit
+
+    Returns:
+        np.ndarray: The running sum (without the step factor), accumulated in float64
+    """
+
+    dtype = theta.dtype
+
+    if _use_jit(theta.size):
+        _, kernel = _numba_kernels()
+        # A few blocks per thread for the parallel scan (numba's thread count cannot be read in cached code)
+        import numba
+        return kernel(theta, float(ecc), 4 * numba.get_num_threads())
+
+    # Evaluate integrand of time integral
+    f = (1 - dtype.type(ecc) * np.cos(theta)) ** -2
+
+    # Define Simpson's rule coefficients
+    L = len(theta)
+    isodd = np.remainder(np.arange(1, L - 1), 2)
+    isodd[isodd == 1] = 4
+    isodd[isodd == 0] = 2
+    c = np.concatenate(([1], isodd, [1])).astype(dtype)
+
+    return np.cumsum(c * f, dtype=np.float64)
@@ -1,8 +1,82 @@
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import numpy as np
-from scipy.interpolate import interp1d
+
+from solarkit.kernels import conic_points
+from solarkit.precision import DTypeLike, orbital_phase, resolve_dtype
+
+
+# lan and argp (deg) that reproduce the original orientation (see orientation_matrices)
+LEGACY_LAN = 270.0
+LEGACY_ARGP = 270.0
+
+
+def orientation_matrices(beta: np.ndarray, lan: np.ndarray, argp: np.ndarray, compute_3D: bool) -> np.ndarray:
+    """
+    Rotation matrices taking points in the orbital plane to their place in space, for many orbits at once
+    
+    The orbital plane is the frame of conic_points, where the polar angle theta is measured from 
+    aphelion (r = a(1 - ecc^2) / (1 - ecc cos(theta))), so perihelion is on its -x axis. The matrix 
+    is the standard R = Rz(lan) @ Rx(beta) @ Rz(argp) applied after a half turn that puts perihelion 
+    on the +x axis: the ascending node is at longitude lan, perihelion is argp past it, and the true 
+    anomaly is theta - pi.
+    
+    Orbits whose lan and argp are both NaN (not set) keep the original orientation: aphelion on the 
+    +x axis, tilted by beta about the y-axis, (x, y) -> (x cos(beta), y, x sin(beta)), and unrotated in 2D. 
+    It is the same as lan = LEGACY_LAN, argp = LEGACY_ARGP (up to rounding). If only one of them is 
+    NaN, it is taken as 0.
+
+    Args:
+        beta (np.ndarray): Inclinations (rad)\n
+        lan (np.ndarray): Longitudes of the ascending node (rad, NaN if not set)\n
+        argp (np.ndarray): Arguments of periapsis (rad, NaN if not set)\n
+        compute_3D (bool): 3D matrices, else 2D rotations by lan + argp + pi (inclination is ignored in 2D)
+
+    Returns:
+        np.ndarray: Array of shape (*beta.shape, 3, 3) (or (*beta.shape, 2, 2) if not compute_3D)
+    """
+    
+    beta, lan, argp = np.broadcast_arrays(beta, lan, argp)
+    
+    legacy = np.isnan(lan) & np.isnan(argp)
+    lan = np.where(np.isnan(lan), 0, lan)
+    
+    # Angle from the line of nodes to aphelion, where theta = 0
+    argp = np.where(np.isnan(argp), 0, argp) + np.pi
+    
+    zero, one = np.zeros_like(beta), np.ones_like(beta)
+    
+    if not compute_3D:
+        angle = lan + argp
+        cos, sin = np.where(legacy, one, np.cos(angle)), np.where(legacy, zero, np.sin(angle))
+        
+        return np.stack([np.stack([cos, -sin], axis=-1),
+                         np.stack([sin, cos], axis=-1)], axis=-2)
+    
+    def about_z(angle):
+        cos, sin = np.cos(angle), np.sin(angle)
+        return np.stack([np.stack([cos, -sin, zero], axis=-1),
+                         np.stack([sin, cos, zero], axis=-1),
+                         np.stack([zero, zero, one], axis=-1)], axis=-2)
+    
+    cos, sin = np.cos(beta), np.sin(beta)
+    tilt = np.stack([np.stack([one, zero, zero], axis=-1),
+                     np.stack([zero, cos, -sin], axis=-1),
+                     np.stack([zero, sin, cos], axis=-1)], axis=-2)
+    
+    rotation = about_z(lan) @ tilt @ about_z(argp)
+    
+    if not legacy.any():
+        return rotation
+    
+    # Tilt about the y-axis
+    legacy_tilt = np.stack([np.stack([cos, zero, -sin], axis=-1),
+                            np.stack([zero, one, zero], axis=-1),
+                            np.stack([sin, zero, cos], axis=-1)], axis=-2)
+    
+    return np.where(legacy[..., None, None], legacy_tilt, rotation)
+
 
 # Objects
 @dataclass
@@ -19,7 +93,10 @@ class Planet:
         R (float): Radius (Earth radii)\n
         trot (float): Rotational period (days)\n
         P (float): Orbital period (years)\n
-        color (str): The colour it will have when viewing
+        color (str): The colour it will have when viewing\n
+        lan (Optional[float]): Longitude of the ascending node (deg), measured from the x-axis\n
+        argp (Optional[float]): Argument of periapsis (deg), angle from the ascending node to perihelion (see orientation_matrices).
+            Leave lan and argp blank for the original orientation (tilted about the y-axis, aphelion on +x)
     """
     
     name: str
@@ -31,17 +108,58 @@ class Planet:
     trot: float
     P: float
     colour: str = field(default="k")    
+    lan: Optional[float] = field(default=None)
+    argp: Optional[float] = field(default=None)
     
     def __str__(self) -> str:
         return self.name
     
     
-    def compute_orbit(self, compute_3D: bool) -> Dict[str, List[float]]:
+    def rotation_matrix(self, compute_3D: bool, dtype: Optional[DTypeLike] = None) -> np.ndarray:
+        """
+        Rotation from the orbital plane to space (see orientation_matrices)
+
+        Args:
+            compute_3D (bool): 3x3 matrix using beta, lan and argp, else 2x2 rotation by lan + argp + pi\n
+            dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)
+
+        Returns:
+            np.ndarray: (3, 3) or (2, 2) matrix
+        """
+        
+        # None becomes NaN, see orientation_matrices
+        lan, argp = np.radians(np.array([self.lan, self.argp], dtype=float))
+        
+        return orientation_matrices(beta=np.radians(self.beta), lan=lan, argp=argp, compute_3D=compute_3D).astype(resolve_dtype(dtype))
+    
+    
+    def orient(self, x: np.ndarray, y: np.ndarray, compute_3D: bool, dtype: Optional[DTypeLike] = None) -> np.ndarray:
+        """
+        Move points in the orbital plane to their place in space
+
+        Args:
+            x (np.ndarray): Points on x-axis of the orbital plane\n
+            y (np.ndarray): Points on y-axis of the orbital plane\n
+            compute_3D (bool): Return x, y and z, else only x and y\n
+            dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)
+
+        Returns:
+            np.ndarray: Array of shape (3 or 2, *x.shape)
+        """
+        
+        # Points in the plane have z = 0, only the first two columns are needed
+        rotation = self.rotation_matrix(compute_3D=compute_3D, dtype=dtype)[:, :2]
+        
+        return np.einsum("ij,j...->i...", rotation, np.stack([x, y]))
+    
+    
+    def compute_orbit(self, compute_3D: bool, dtype: Optional[DTypeLike] = None) -> Dict[str, List[float]]:
         """
         Compute the points for its orbit
 
         Args:
-            compute_3D (bool): Compute the orbit using beta (inclination)
+            compute_3D (bool): Compute the orbit in 3D using beta (inclination)\n
+            dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)
 
         Returns:
             Dict: {name: planet name, 
@@ -54,22 +172,17 @@ class Planet:
         """
         
         
-        theta = np.linspace(0, 2*np.pi, 1000)
+        dtype = resolve_dtype(dtype)
+        
+        theta = np.linspace(0, 2*np.pi, 1000, dtype=dtype)
         
         # 2D Orbits
-        r = self.a * (1 - self.ecc**2) / (1 - self.ecc * np.cos(theta))
-        x = r * np.cos(theta)
-        y = r * np.sin(theta)
+        x, y = conic_points(dtype.type(self.a), dtype.type(self.ecc), theta)
         
         
         if compute_3D:
-            # Beta to radians
-            beta: float = self.beta*np.pi/180
-            
             # 3D orbits
-            xx = x * np.cos(beta)
-            yy = y
-            zz = x * np.sin(beta)
+            xx, yy, zz = self.orient(x, y, compute_3D=True, dtype=dtype)
             
             return {"name": self.name,
                     "c": self.colour,
@@ -78,19 +191,22 @@ class Planet:
                     "z": zz} 
         
         else:
+            xx, yy = self.orient(x, y, compute_3D=False, dtype=dtype)
+            
             return {"name": self.name,
                     "c": self.colour,
-                    "x": x,
-                    "y": y}
+                    "x": xx,
+                    "y": yy}
             
             
-    def compute_position(self, compute_3D: bool, t: float) -> Dict[str, float]:
+    def compute_position(self, compute_3D: bool, t: float, dtype: Optional[DTypeLike] = None) -> Dict[str, float]:
         """
         Computes the point the planet will be in at a given time (t)
 
         Args:
-            compute_3D (bool): Compute the orbit using beta (inclination)\n
+            compute_3D (bool): Compute the orbit in 3D using beta (inclination)\n
             t (float): The time to simulate\n
+            dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)\n
 
         Returns:
             Dict: {name: planet name,
@@ -103,19 +219,14 @@ class Planet:
         """
         
         # Planets
-        planet_theta: float = (2*np.pi*t)/self.P
-        r = self.a * (1 - self.ecc**2) / (1 - self.ecc * np.cos(planet_theta))
-        x = r * np.cos(planet_theta)
-        y = r * np.sin(planet_theta)
+        dtype = resolve_dtype(dtype)
+        
+        planet_theta: float = orbital_phase(t=t, P=self.P, dtype=dtype)
+        x, y = conic_points(dtype.type(self.a), dtype.type(self.ecc), planet_theta)
         
         if compute_3D:
-            # Beta to radians
-            beta: float = self.beta*np.pi/180
-            
             # 3D orbits
-            xx = x * np.cos(beta)
-            yy = y
-            zz = x * np.sin(beta)
+            xx, yy, zz = self.orient(x, y, compute_3D=True, dtype=dtype)
             
             return {"name": self.name,
                     "c": self.colour,
@@ -124,10 +235,12 @@ class Planet:
                     "z": zz}
             
         else:
+            xx, yy = self.orient(x, y, compute_3D=False, dtype=dtype)
+            
             return {"name": self.name,
                     "c": self.colour,
-                    "x": x,
-                    "y": y}
+                    "x": xx,
+                    "y": yy}
     
     
 
@@ -0,0 +1,90 @@
+"""
+Floating point precision of the geometry pipeline
+
+Everything is computed in float64 by default. Setting float32 (globally with set_default_dtype 
+or per call with the dtype argument) halves memory and bandwidth, which is plenty for drawing.
+
+Accuracy in float32 (machine epsilon ~1.2e-7):
+    * Orbits and positions: relative error of a few epsilon, |error| < 5e-7 * a AU 
+      (~3000 km for Pluto, far below a pixel at any sensible figure size).
+    * Time to angle: the orbital phase 2*pi*t/P is reduced to [0, 2*pi) in float64 before casting, 
+      so the error does not grow with t (no loss of precision over long time spans).
+    * compute_angle_vs_time: the integration grid, the Simpson sum and the interpolation are always 
+      float64 (in float32, grid points up to 2*pi*N rad would collapse into duplicates), only the 
+      returned angles are rounded to float32: relative error < 6e-8, i.e. < 6e-8 * 2*pi*N rad after N orbits.
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+
+
+DTypeLike = Union[str, type, np.dtype]
+
+_SUPPORTED = (np.dtype(np.float32), np.dtype(np.float64))
+_default_dtype = np.dtype(np.float64)
+
+
+def set_default_dtype(dtype: DTypeLike) -> None:
+    """
+    Set the dtype used when no dtype is given to a computation
+
+    Args:
+        dtype (DTypeLike): np.float32 or np.float64
+    """
+    
+    global _default_dtype
+    
+    _default_dtype = resolve_dtype(dtype)
+
+
+def get_default_dtype() -> np.dtype:
+    """
+    Returns:
+        np.dtype: The dtype used when no dtype is given to a computation
+    """
+    
+    return _default_dtype
+
+
+def resolve_dtype(dtype: Optional[DTypeLike] = None) -> np.dtype:
+    """
+    Args:
+        dtype (Optional[DTypeLike]): np.float32, np.float64 or None for the default dtype
+
+    Raises:
+        ValueError: dtype is not float32 or float64
+
+    Returns:
+        np.dtype: The dtype to compute with
+    """
+    
+    if dtype is None:
+        return _default_dtype
+    
+    dtype = np.dtype(dtype)
+    if dtype not in _SUPPORTED:
+        raise ValueError(f"{dtype} not supported, use float32 or float64")
+    
+    return dtype
+
+
+def orbital_phase(t, P, dtype: np.dtype):
+    """
+    Polar angle 2*pi*t/P, reduced to [0, 2*pi) in float64 first when computing in lower precision
+
+    Args:
+        t (float | np.ndarray): Time(s) (years)\n
+        P (float | np.ndarray): Orbital period(s) (years)\n
+        dtype (np.dtype): dtype of the result
+
+    Returns:
+        float | np.ndarray: Polar angle(s) (rad)
+    """
+    
+    theta = 2 * np.pi * np.asarray(t, dtype=np.float64) / P
+    
+    if dtype == np.float64:
+        return theta
+    
+    return np.mod(theta, 2 * np.pi).astype(dtype)
@@ -0,0 +1,522 @@
+"""
+Local render service: Viewer plots over HTTP, rendered by a pool of warm worker processes
+
+Each worker loads the systems and matplotlib once (when the pool starts), then handles
+render requests given as JSON:
+
+    {"system": "solar", "method": "heliocentric_model", "params": {"origin_planet_name": "Earth"},
+     "planets": ["Mercury", "Venus", "Earth"], "compute_3D": false, "format": "png", "dpi": 100}
+
+and returns the image bytes. At most `workers + max_queue` requests are in flight (more are
+refused straight away) and a request that takes longer than `timeout` seconds is answered with
+an error and stopped in its worker: an alarm interrupts the render at its deadline, and if the
+worker still has not let go a few seconds later the pool is replaced and its processes killed.
+The params of each method are checked against PARAM_SCHEMAS before anything is queued. Identical requests that arrive while one is rendering share its result (see
+solarkit.coalesce). Run it with serve(), or mount RenderService.wsgi_app in any WSGI server.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import threading
+import time
+import weakref
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, TimeoutError
+from io import BytesIO
+from socketserver import ThreadingMixIn
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from wsgiref.simple_server import WSGIServer, make_server
+
+from solarkit.coalesce import SingleFlight, normalize_key
+from solarkit.instrumentation import span
+from solarkit.kernels import process_context
+from solarkit.solar_system import Solar_System
+
+
+# Viewer methods that draw a still figure (animations never return)
+RENDER_METHODS = ("system_orbits", "third_law", "spinograph", "heliocentric_model", "angle_vs_time_comparison")
+
+# Params a client may pass to each method: {param: (type, lowest, highest)}, bounds are inclusive,
+# for strings they bound the length. Anything else (e.g. block_size) keeps the Viewer default
+PARAM_SCHEMAS = {"system_orbits": {},
+                 "third_law": {},
+                 "spinograph": {"lines_drawn": (int, 1, 20000),
+                                "auto_close": (bool, None, None),
+                                "density": (float, 1, 1000),
+                                "closure_tolerance": (float, 1e-4, 0.5),
+                                "max_lines": (int, 1, 20000)},
+                 "heliocentric_model": {"origin_planet_name": (str, 1, 100),
+                                        "num_points": (int, 1, 100000)},
+                 "angle_vs_time_comparison": {"planet_a_name": (str, 1, 100)}}
+
+# Params without a Viewer default
+REQUIRED_PARAMS = {"heliocentric_model": ("origin_planet_name",)}
+
+# Seconds a timed out render gets to stop before its worker is killed
+KILL_GRACE = 5
+
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+_STATUS = {200: "200 OK", 400: "400 Bad Request", 404: "404 Not Found", 405: "405 Method Not Allowed",
+           500: "500 Internal Server Error", 503: "503 Service Unavailable", 504: "504 Gateway Timeout"}
+
+
+class ServiceBusy(RuntimeError):
+    """
+    Raised when the request queue is full
+    """
+
+
+# Set in every worker process by _init_worker
+_systems: Dict[str, Solar_System] = {}
+
+
+def load_system(source: Union[str, Solar_System]) -> Solar_System:
+    """
+    Load a system from a .csv, .parquet, .feather or pickled (see save_system) file
+    
+    Args:
+        source (Union[str, Solar_System]): The path, or an already loaded system
+    
+    Returns:
+        Solar_System: The system
+    """
+    
+    if isinstance(source, Solar_System):
+        return source
+    
+    from solarkit.utils import load_model, load_system_from_csv, load_system_from_parquet
+    
+    extension = os.path.splitext(source)[1].lower()
+    
+    if extension == ".csv":
+        return load_system_from_csv(source)
+    if extension in (".parquet", ".feather", ".arrow"):
+        return load_system_from_parquet(source, file_format="parquet" if extension == ".parquet" else "feather")
+    
+    return load_model(source)
+
+
+def _init_worker(systems: Dict[str, Union[str, Solar_System]]) -> None:
+    """
+    Load the systems and matplotlib once per worker process
+    """
+    
+    import matplotlib
+    matplotlib.use("Agg")
+    
+    # Imported (and the kernels compiled or loaded from the cache) here so the first request does not pay for it
+    import solarkit.viewer  # noqa: F401
+    from solarkit.kernels import warm_up
+    warm_up()
+    
+    global _systems
+    _systems = {name: load_system(source) for name, source in systems.items()}
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def validate_params(method: str, params: Dict) -> Dict:
+    """
+    Check the params of a render method against PARAM_SCHEMAS
+    
+    Args:
+        method (str): One of RENDER_METHODS\n
+        params (Dict): {param: value}
+    
+    Raises:
+        ValueError: A param is unknown, missing, of the wrong type or out of bounds
+    
+    Returns:
+        Dict: The params, ints given for floats converted
+    """
+    
+    schema = PARAM_SCHEMAS[method]
+    
+    unknown = set(params) - set(schema)
+    if unknown:
+        raise ValueError(f"Unknown params {sorted(unknown)} for {method}, choose from {sorted(schema)}")
+    
+    missing = [param for param in REQUIRED_PARAMS.get(method, ()) if param not in params]
+    if missing:
+        raise ValueError(f"{method} needs params {missing}")
+    
+    checked = {}
+    for param, value in params.items():
+        kind, low, high = schema[param]
+        
+        # bool is a subclass of int, and JSON has no separate int for floats
+        if isinstance(value, bool) != (kind is bool) or not isinstance(value, (int, float) if kind is float else kind):
+            raise ValueError(f"{param} must be of type {kind.__name__}")
+        
+        if kind is float:
+            value = float(value)
+        
+        size = len(value) if kind is str else value
+        if low is not None and not low <= size <= high:
+            raise ValueError(f"{param} must be in [{low}, {high}]" + (" characters long" if kind is str else ""))
+        
+        checked[param] = value
+    
+    return checked
+
+
+def validate_request(request: Dict, systems: Iterable[str]) -> Dict:
+    """
+    Check a render request and fill in the defaults
+    
+    Args:
+        request (Dict): The request (see module docstring)\n
+        systems (Iterable[str]): Names of the loaded systems
+    
+    Raises:
+        ValueError: The request is malformed, asks for an unknown system, method or format, or has invalid params (see validate_params)
+    
+    Returns:
+        Dict: {system, method, params, planets, compute_3D, format, dpi}
+    """
+    
+    if not isinstance(request, dict):
+        raise ValueError("A render request must be a JSON object")
+    
+    unknown = set(request) - {"system", "method", "params", "planets", "compute_3D", "format", "dpi"}
+    if unknown:
+        raise ValueError(f"Unknown request fields {sorted(unknown)}")
+    
+    if request.get("system") not in systems:
+        raise ValueError(f"Unknown system {request.get('system')!r}, choose from {sorted(systems)}")
+    
+    if request.get("method") not in RENDER_METHODS:
+        raise ValueError(f"Unknown method {request.get('method')!r}, choose from {list(RENDER_METHODS)}")
+    
+    params = request.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    params = validate_params(request["method"], params)
+    
+    planets = request.get("planets") or []
+    if not isinstance(planets, list) or not all(isinstance(name, str) for name in planets):
+        raise ValueError("planets must be a list of planet names")
+    
+    image_format = request.get("format", "png")
+    if image_format not in CONTENT_TYPES:
+        raise ValueError(f"Unknown format {image_format!r}, choose from {list(CONTENT_TYPES)}")
+    
+    compute_3D = request.get("compute_3D", False)
+    if not isinstance(compute_3D, bool):
+        raise ValueError("compute_3D must be true or false")
+    
+    # bool is a subclass of int, and matplotlib cannot lay out a figure at a few dots per inch
+    dpi = request.get("dpi", 100)
+    if isinstance(dpi, bool) or not isinstance(dpi, (int, float)) or not 10 <= dpi <= 1000:
+        raise ValueError("dpi must be a number in [10, 1000]")
+    
+    return {"system": request["system"],
+            "method": request["method"],
+            "params": params,
+            "planets": planets,
+            "compute_3D": compute_3D,
+            "format": image_format,
+            "dpi": dpi}
+
+
+def _on_alarm(signum, frame) -> None:
+    raise TimeoutError("Render deadline reached")
+
+
+def render(request: Dict, deadline: Optional[float] = None) -> Tuple[bytes, str]:
+    """
+    Draw a validated request (see validate_request) with a Viewer and return the image (runs in a worker process)
+    
+    Args:
+        request (Dict): The validated request\n
+        deadline (Optional[float]): time.time() after which the render is abandoned (leave blank for no limit)
+    
+    Raises:
+        TimeoutError: The deadline passed before or during the render
+    
+    Returns:
+        Tuple[bytes, str]: Image bytes and content type
+    """
+    
+    if deadline is None:
+        return _render(request)
+    
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise TimeoutError("Render deadline passed while queued")
+    
+    # Worker tasks run in the main thread of the worker process, where signal handlers run
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return _render(request)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _render(request: Dict) -> Tuple[bytes, str]:
+    import matplotlib.pyplot as plt
+    from solarkit.viewer import Viewer
+    
+    system = _systems[request["system"]]
+    missing = [name for name in request["planets"] if name not in system.planets]
+    if missing:
+        raise ValueError(f"Planets {missing} not found in {request['system']}")
+    
+    viewer = Viewer(system=system, planets_to_use=request["planets"], compute_3D=request["compute_3D"], output_dpi=request["dpi"])
+    viewer.initialise_plotter(dpi=request["dpi"])
+    
+    try:
+        getattr(viewer, request["method"])(**request["params"])
+        
+        with span("service.serialize"):
+            image = BytesIO()
+            viewer.fig.savefig(image, format=request["format"], dpi=request["dpi"])
+    finally:
+        plt.close(viewer.fig)
+    
+    return image.getvalue(), CONTENT_TYPES[request["format"]]
+
+
+class RenderService:
+    """
+    Bounded pool of warm worker processes that render Viewer plots
+    
+    Args:
+        systems (Dict[str, Union[str, Solar_System]]): Systems to preload, {name: path or Solar_System}\n
+        workers (Optional[int]): Worker processes (None for one per CPU)\n
+        max_queue (int): Requests that can wait for a free worker, more are refused with ServiceBusy. Defaults to 16\n
+        timeout (float): Seconds a request can take before TimeoutError. Defaults to 30\n
+        coalesce (bool): Identical requests in flight at the same time are rendered once. Defaults to True
+    """
+    
+    def __init__(self, systems: Dict[str, Union[str, Solar_System]], workers: Optional[int] = None, max_queue: int = 16, timeout: float = 30, coalesce: bool = True) -> None:
+        self.systems = dict(systems)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        
+        self._flight = SingleFlight() if coalesce else None
+        
+        self._slots = threading.BoundedSemaphore(self.workers + max_queue)
+        self._pool_lock = threading.Lock()
+        self._pool = self._new_pool()
+        # Pool each render was submitted to, to recycle the right one if it does not stop
+        self._pool_of: "weakref.WeakKeyDictionary[Future, ProcessPoolExecutor]" = weakref.WeakKeyDictionary()
+    
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.systems,), mp_context=process_context())
+    
+    def __enter__(self) -> "RenderService":
+        return self
+    
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+    
+    def warm_up(self) -> List[int]:
+        """
+        Start every worker (and load the systems) now instead of on the first requests
+        
+        Returns:
+            List[int]: pids of the workers that answered
+        """
+        
+        return [future.result() for future in [self._pool.submit(_ping) for _ in range(self.workers)]]
+    
+    def close(self) -> None:
+        """
+        Stop the workers
+        """
+        
+        with self._pool_lock:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+    
+    def _recycle(self, pool: ProcessPoolExecutor) -> None:
+        """
+        Replace pool with a fresh one and kill its workers (its unfinished renders fail with BrokenExecutor)
+        """
+        
+        with self._pool_lock:
+            if self._pool is not pool:
+                return
+            self._pool = self._new_pool()
+            # Start the new workers now rather than on the next request
+            self._pool.submit(_ping)
+        
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _watch(self, future: Future) -> None:
+        """
+        Recycle the pool of a render if it a timed out render has not stopped KILL_GRACE seconds after its deadline
+        (the alarm cannot interrupt code that does not return to the interpreter, e.g. a long NumPy call)
+        """
+        
+        pool = self._pool_of.get(future)
+        
+        def check() -> None:
+            if pool is not None and not future.done():
+                self._recycle(pool)
+        
+        timer = threading.Timer(KILL_GRACE, check)
+        timer.daemon = True
+        timer.start()
+    
+    def submit(self, request: Dict) -> Future:
+        """
+        Queue a render request
+        
+        Args:
+            request (Dict): The request (see module docstring)
+        
+        Raises:
+            ValueError: The request is invalid (see validate_request)
+            ServiceBusy: workers + max_queue requests are already in flight
+        
+        Returns:
+            Future: Resolves to (image bytes, content type), shared with identical requests in flight (do not cancel it)
+        """
+        
+        request = validate_request(request, self.systems)
+        
+        if self._flight is None:
+            return self._submit(request)
+        
+        # Joining a render in flight does not take a queue slot
+        return self._flight.do_future(normalize_key(request), lambda: self._submit(request))
+    
+    def _submit(self, request: Dict) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy(f"More than {self.workers + self.max_queue} requests in flight")
+        
+        try:
+            with self._pool_lock:
+                pool = self._pool
+                future = pool.submit(render, request, time.time() + self.timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+        
+        # The slot is only freed when the worker is done (stopped at the deadline, or killed after it)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._pool_of[future] = pool
+        
+        return future
+    
+    def render(self, request: Dict) -> Tuple[bytes, str]:
+        """
+        Render a request and wait for the result
+        
+        Args:
+            request (Dict): The request (see module docstring)
+        
+        Raises:
+            ValueError: The request is invalid
+            ServiceBusy: The queue is full
+            TimeoutError: The render took longer than self.timeout
+            BrokenExecutor: The worker was killed (another render on it timed out and did not stop)
+        
+        Returns:
+            Tuple[bytes, str]: Image bytes and content type
+        """
+        
+        with span("service.render"):
+            future = self.submit(request)
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError:
+                self._watch(future)
+                raise
+    
+    async def arender(self, request: Dict) -> Tuple[bytes, str]:
+        """
+        Render a request without blocking the event loop (same as render)
+        
+        Args:
+            request (Dict): The request (see module docstring)
+        
+        Returns:
+            Tuple[bytes, str]: Image bytes and content type
+        """
+        
+        submitted = self.submit(request)
+        future = asyncio.wrap_future(submitted)
+        
+        try:
+            # Shielded: timing out must not cancel a render other requests are waiting on
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._watch(submitted)
+            raise TimeoutError(f"Render took longer than {self.timeout}s")
+    
+    def wsgi_app(self, environ: Dict, start_response) -> List[bytes]:
+        """
+        WSGI application: POST /render with a JSON request, answers with the image
+        """
+        
+        def respond(status: int, body: bytes, content_type: str = "application/json") -> List[bytes]:
+            start_response(_STATUS[status], [("Content-Type", content_type), ("Content-Length", str(len(body)))])
+            return [body]
+        
+        def error(status: int, message: str) -> List[bytes]:
+            return respond(status, json.dumps({"error": message}).encode())
+        
+        if environ.get("PATH_INFO", "") not in ("/render", "/render/"):
+            return error(404, "Not found")
+        
+        if environ.get("REQUEST_METHOD") != "POST":
+            return error(405, "Use POST")
+        
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+            request = json.loads(environ["wsgi.input"].read(length) or b"null")
+            image, content_type = self.render(request)
+        
+        except (ValueError, TypeError, KeyError) as e:
+            return error(400, str(e))
+        except ServiceBusy as e:
+            return error(503, str(e))
+        except BrokenExecutor:
+            return error(503, "The worker was restarted, retry the request")
+        except TimeoutError:
+            return error(504, f"Render took longer than {self.timeout}s")
+        except Exception as e:
+            # Anything else is a failed render (e.g. matplotlib), the client still gets JSON
+            return error(500, f"Render failed: {type(e).__name__}: {e}")
+        
+        return respond(200, image, content_type)
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def serve(systems: Dict[str, Union[str, Solar_System]], host: str = "127.0.0.1", port: int = 8000, workers: Optional[int] = None, max_queue: int = 16, timeout: float = 30) -> None:
+    """
+    Run the render service until interrupted (see RenderService)
+    
+    Args:
+        systems (Dict[str, Union[str, Solar_System]]): Systems to preload, {name: path or Solar_System}\n
+        host (str): Address to listen on. Defaults to "127.0.0.1"\n
+        port (int): Port to listen on. Defaults to 8000\n
+        workers (Optional[int]): Worker processes (None for one per CPU)\n
+        max_queue (int): Requests that can wait for a free worker. Defaults to 16\n
+        timeout (float): Seconds a request can take. Defaults to 30
+    """
+    
+    with RenderService(systems=systems, workers=workers, max_queue=max_queue, timeout=timeout) as service:
+        service.warm_up()
+        
+        with make_server(host, port, service.wsgi_app, server_class=_ThreadingWSGIServer) as server:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
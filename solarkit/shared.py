@@ -0,0 +1,238 @@
+"""
+Share a system's tables between processes with multiprocessing.shared_memory
+
+publish() writes the planet parameters, names, colours and the precomputed orbit of every
+planet into one shared memory block. Other processes (e.g. web server workers) attach() to it
+by name and get NumPy views of the same memory: nothing is copied, parsed or recomputed, so
+every worker shares one copy and starts straight away.
+
+Layout of the block: an 8 byte little-endian header length, a JSON header (system name,
+settings, data offset and the dtype, shape and relative offset of every array), then the
+arrays, 64 byte aligned.
+"""
+
+import json
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from solarkit.ephemeris import orbital_elements, place_on_orbits
+from solarkit.planet import Planet
+from solarkit.precision import DTypeLike, resolve_dtype
+from solarkit.solar_system import Solar_System
+
+
+# Numeric Planet fields stored as float64 columns
+COLUMNS = ("m", "a", "ecc", "beta", "R", "trot", "P", "lan", "argp")
+
+_ALIGN = 64
+
+
+class SharedSystem:
+    """
+    A system's tables in shared memory (use publish or attach to get one)
+
+    Attributes:
+        name (str): Name of the shared memory block (pass it to attach)\n
+        system_name (str): Name of the system\n
+        compute_3D (bool): Whether the orbits are 3D\n
+        arrays (Dict[str, np.ndarray]): Views of the shared memory: name, colour, every column in COLUMNS
+            and orbits, of shape (2 or 3, number of planets, samples)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self._shm = shm
+        self.owner = owner
+
+        length = int.from_bytes(bytes(shm.buf[:8]), "little")
+        header = json.loads(bytes(shm.buf[8:8 + length]).decode())
+
+        self.name: str = shm.name
+        self.system_name: str = header["system_name"]
+        self.compute_3D: bool = header["compute_3D"]
+        self.arrays: Dict[str, np.ndarray] = {}
+
+        for key, spec in header["arrays"].items():
+            # frombuffer holds an export of the buffer for as long as the view (or any view of it) lives,
+            # so closing the block while one is in use raises instead of unmapping memory still read from
+            shape = tuple(spec["shape"])
+            array = np.frombuffer(shm.buf, dtype=np.dtype(spec["dtype"]), count=int(np.prod(shape)), offset=header["data_offset"] + spec["offset"]).reshape(shape)
+            # Attached processes only read, so a stray write cannot corrupt everyone's copy
+            array.flags.writeable = False
+            self.arrays[key] = array
+
+        self._index = {str(name): i for i, name in enumerate(self.arrays["name"])}
+
+    def __len__(self) -> int:
+        return len(self.arrays["name"])
+
+    def __enter__(self) -> "SharedSystem":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        try:
+            self.close()
+        finally:
+            if self.owner:
+                self.unlink()
+        return False
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory
+
+        Raises:
+            BufferError: Arrays from this block (arrays, elements, orbit_data, or orbits preloaded in a Viewer) are still 
+                in use, delete them first
+        """
+
+        self.arrays = {}
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """
+        Free the shared memory once every process has closed it (call once, from the publisher)
+        """
+
+        self._shm.unlink()
+
+    def elements(self, dtype: Optional[DTypeLike] = None) -> Dict[str, np.ndarray]:
+        """
+        The orbital elements as ephemeris.orbital_elements returns them, for the vectorised ephemeris functions
+
+        Args:
+            dtype (Optional[DTypeLike]): dtype of a, ecc and the angles (leave blank for the default, see solarkit.precision)
+
+        Returns:
+            Dict[str, np.ndarray]: {a, ecc, beta, lan, argp (rad), P}
+        """
+
+        dtype = resolve_dtype(dtype)
+        columns = self.arrays
+
+        return {"a": columns["a"].astype(dtype, copy=False),
+                "ecc": columns["ecc"].astype(dtype, copy=False),
+                "beta": (columns["beta"] * np.pi / 180).astype(dtype),
+                "lan": (columns["lan"] * np.pi / 180).astype(dtype),
+                "argp": (columns["argp"] * np.pi / 180).astype(dtype),
+                "P": columns["P"]}
+
+    def orbit_data(self, planet_names: Optional[List[str]] = None) -> List[Dict[str, np.ndarray]]:
+        """
+        Precomputed orbits in the format of Planet.compute_orbit (x, y, z are views, no copy)
+
+        Args:
+            planet_names (Optional[List[str]]): Planets to use (leave blank for all)
+
+        Returns:
+            List[Dict]: [{name, c, x, y(, z)}] in the order of planet_names
+        """
+
+        if planet_names is None:
+            planet_names = list(self._index)
+
+        orbits = []
+        for planet_name in planet_names:
+            i = self._index[planet_name]
+            orbit = {"name": planet_name, "c": str(self.arrays["colour"][i])}
+            orbit.update(zip("xyz", self.arrays["orbits"][:, i]))
+            orbits.append(orbit)
+
+        return orbits
+
+    def to_system(self) -> Solar_System:
+        """
+        Build a Solar_System from the shared tables (this creates one Planet object per row)
+
+        Returns:
+            Solar_System: The system
+        """
+
+        columns = {column: self.arrays[column].tolist() for column in COLUMNS}
+        # Unset orientations are stored as NaN (see Planet)
+        for column in ("lan", "argp"):
+            columns[column] = [None if np.isnan(value) else value for value in columns[column]]
+        columns = list(columns.values())
+        names = self.arrays["name"].tolist()
+        colours = self.arrays["colour"].tolist()
+
+        system = Solar_System(system_name=self.system_name)
+        system.extend((Planet(name=name, colour=colour, **dict(zip(COLUMNS, values))) for name, colour, *values in zip(names, colours, *columns)), force_add=True)
+
+        return system
+
+
+def publish(system: Solar_System, name: Optional[str] = None, compute_3D: bool = True, orbit_samples: int = 1000, dtype: Optional[DTypeLike] = None) -> SharedSystem:
+    """
+    Copy a system's tables and orbits into a new shared memory block
+
+    Args:
+        system (Solar_System): The system\n
+        name (Optional[str]): Name of the block (leave blank for a random one)\n
+        compute_3D (bool): Compute the orbits in 3D. Defaults to True\n
+        orbit_samples (int): Points per orbit. Defaults to 1000 (as Planet.compute_orbit)\n
+        dtype (Optional[DTypeLike]): dtype of the orbits (leave blank for the default, see solarkit.precision)
+
+    Returns:
+        SharedSystem: The published tables, owned by this process (unlink it when done)
+    """
+
+    dtype = resolve_dtype(dtype)
+    planets = list(system.planets.values())
+
+    theta = np.linspace(0, 2*np.pi, orbit_samples, dtype=dtype)
+    arrays = {column: np.array([getattr(planet, column) for planet in planets], dtype=np.float64) for column in COLUMNS}
+    arrays["name"] = np.array([planet.name for planet in planets], dtype=str)
+    arrays["colour"] = np.array([planet.colour for planet in planets], dtype=str)
+    arrays["orbits"] = place_on_orbits(orbital_elements(planets, dtype=dtype), theta, compute_3D=compute_3D).astype(dtype, copy=False)
+
+    specs = {}
+    offset = 0
+    for key, array in arrays.items():
+        specs[key] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    # The arrays start after the header (with room for the digits of data_offset itself)
+    header = {"version": 1, "system_name": system.system_name, "compute_3D": compute_3D, "data_offset": 0, "arrays": specs}
+    start = -(-(8 + len(json.dumps(header).encode()) + 32) // _ALIGN) * _ALIGN
+    header["data_offset"] = start
+
+    encoded = json.dumps(header).encode()
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(start + offset, 1))
+    shm.buf[:8] = len(encoded).to_bytes(8, "little")
+    shm.buf[8:8 + len(encoded)] = encoded
+
+    for key, array in arrays.items():
+        np.frombuffer(shm.buf, dtype=array.dtype, count=array.size, offset=start + specs[key]["offset"]).reshape(array.shape)[...] = array
+
+    return SharedSystem(shm, owner=True)
+
+
+def attach(name: str) -> SharedSystem:
+    """
+    Attach to a block created by publish (in any process)
+
+    Args:
+        name (str): Name of the block (SharedSystem.name)
+
+    Returns:
+        SharedSystem: Read-only views of the shared tables
+    """
+
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 (no track argument) every attached process registers the block with a
+        # resource tracker, which unlinks it when the process exits. Only the publisher should own it
+        from multiprocessing import resource_tracker
+
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+    return SharedSystem(shm, owner=False)
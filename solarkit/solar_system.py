@@ -1,10 +1,46 @@
+import warnings
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
-from scipy.interpolate import interp1d
 
 from solarkit.planet import Planet
+from solarkit.instrumentation import span
+from solarkit.kernels import simpson_cumsum
+from solarkit.precision import DTypeLike, resolve_dtype
+from solarkit.ephemeris import DEFAULT_BLOCK_SIZE, compute_positions, iter_position_blocks
+
+
+EVENT_KINDS = ("conjunction", "opposition", "closest")
+
+# Planet properties with a maintained sorted index
+INDEXED_PROPERTIES = ("P", "a")
+
+
+def _event_values(kind: str, positions: np.ndarray, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    The function whose roots (conjunction, opposition) or minima (closest) are the events
+
+    Args:
+        kind (str): One of EVENT_KINDS\n
+        positions (np.ndarray): Positions of shape (2 or 3, number of planets, times)\n
+        first (np.ndarray): Index of the first planet of every pair\n
+        second (np.ndarray): Index of the second planet of every pair
+
+    Returns:
+        np.ndarray: Values of shape (number of pairs, times)
+    """
+    
+    if kind == "closest":
+        # Separation
+        return np.sqrt(np.sum((positions[:, first] - positions[:, second])**2, axis=0))
+    
+    # Difference in (ecliptic) longitude, wrapped to [-pi, pi)
+    longitude = np.arctan2(positions[1], positions[0])
+    offset = np.pi if kind == "opposition" else 0
+    
+    return np.mod(longitude[first] - longitude[second] - offset + np.pi, 2 * np.pi) - np.pi
 
 
 @dataclass
@@ -12,10 +48,12 @@ class Solar_System:
     """
     Solar system class
 
-    Holds the planet data
+    Holds the planet data, with sorted indexes on P and a (see sorted_by and select). Lookups in the indexes 
+    are O(log n + k), keeping them up to date in add and remove is O(n) per planet
     """
     system_name: Optional[str] = field(default="Solar System")
     planets: Dict[str, Planet] = field(init=False, default_factory=dict)
+    _indexes: Dict[str, Tuple[List[float], List[str]]] = field(init=False, repr=False, compare=False, default_factory=dict)
     
     
     def __str__(self):
@@ -30,11 +68,134 @@ class Solar_System:
             planet (Planet): A Planet object\n
             force_add (bool): Ignore the constraint
         
-        The planet's .a property must be greater than 0 for it to be added
+        The planet's .a property must be greater than 0 for it to be added. The sorted indexes are updated 
+        with a binary search, but inserting into them is O(n) (list insert), use extend to add many planets
         """
         
         if planet.a > 0 or force_add:
+            if planet.name in self.planets:
+                self.remove(planet.name)
+            
+            # Before the planet is in self.planets, else a rebuild would already include it
+            indexes = self._get_indexes()
+            
+            for key, (values, names) in indexes.items():
+                value = getattr(planet, key)
+                position = bisect_right(values, value)
+                values.insert(position, value)
+                names.insert(position, planet.name)
+            
             self.planets[planet.name] = planet
+    
+    def extend(self, planets: Iterable[Planet], force_add: bool = False) -> None:
+        """
+        Add many planets at once (same rules as add), the sorted indexes are rebuilt once instead of updated per planet
+
+        Args:
+            planets (Iterable[Planet]): Planet objects\n
+            force_add (bool): Ignore the constraint
+        """
+        
+        for planet in planets:
+            if planet.a > 0 or force_add:
+                self.planets[planet.name] = planet
+        
+        # Rebuilt the next time they are needed (see _get_indexes)
+        self._indexes = {}
+    
+    def remove(self, planet_name: str) -> Planet:
+        """
+        Remove a planet from the system
+
+        Args:
+            planet_name (str): Planet name
+
+        Raises:
+            KeyError: Planet name not found in self.planets
+
+        Returns:
+            Planet: The removed planet
+        """
+        
+        if planet_name not in self.planets:
+            raise KeyError(f"{planet_name} not found")
+        
+        indexes = self._get_indexes()
+        planet = self.planets.pop(planet_name)
+        
+        for key, (values, names) in indexes.items():
+            value = getattr(planet, key)
+            
+            # Only search among the planets with the same value (unless the planet was edited since it was added)
+            start, end = bisect_left(values, value), bisect_right(values, value)
+            position = names.index(planet_name, start, end) if planet_name in names[start:end] else names.index(planet_name)
+            
+            del values[position]
+            del names[position]
+        
+        return planet
+    
+    def _get_indexes(self) -> Dict[str, Tuple[List[float], List[str]]]:
+        """
+        The sorted indexes {property: (sorted values, planet names)}, rebuilt if they are missing 
+        (e.g. systems pickled before they existed) or out of date (self.planets edited directly)
+        """
+        
+        indexes = getattr(self, "_indexes", None)
+        
+        if not indexes or any(len(names) != len(self.planets) for _, names in indexes.values()):
+            indexes = {}
+            for key in INDEXED_PROPERTIES:
+                ordered = sorted(self.planets.values(), key=lambda planet: getattr(planet, key))
+                indexes[key] = ([getattr(planet, key) for planet in ordered], [planet.name for planet in ordered])
+            
+            self._indexes = indexes
+        
+        return indexes
+    
+    def sorted_by(self, key: str = "P") -> List[Planet]:
+        """
+        Planets sorted by a property, from the maintained index (no sorting needed)
+
+        Args:
+            key (str): "P" or "a". Defaults to "P"
+
+        Returns:
+            List[Planet]: Planets in ascending order of key
+        """
+        
+        _, names = self._get_index(key)
+        
+        return [self.planets[planet_name] for planet_name in names]
+    
+    def select(self, key: str, low: Optional[float] = None, high: Optional[float] = None, inclusive: bool = False) -> List[Planet]:
+        """
+        Planets with low < key < high, found with a binary search in O(log n + k)
+        
+        For example select("a", 2, 3.5) returns all bodies with 2 < a < 3.5 AU
+
+        Args:
+            key (str): "P" or "a"\n
+            low (Optional[float]): Lower bound (leave blank for no lower bound)\n
+            high (Optional[float]): Upper bound (leave blank for no upper bound)\n
+            inclusive (bool): Include the bounds (low <= key <= high). Defaults to False
+
+        Returns:
+            List[Planet]: Matching planets in ascending order of key
+        """
+        
+        values, names = self._get_index(key)
+        
+        start = 0 if low is None else (bisect_left if inclusive else bisect_right)(values, low)
+        end = len(values) if high is None else (bisect_right if inclusive else bisect_left)(values, high)
+        
+        return [self.planets[planet_name] for planet_name in names[start:end]]
+    
+    def _get_index(self, key: str) -> Tuple[List[float], List[str]]:
+        if key not in INDEXED_PROPERTIES:
+            raise KeyError(f"{key} is not indexed, use one of {INDEXED_PROPERTIES}")
+        
+        return self._get_indexes()[key]
             
     def compute_relative_vector(self, origin_planet_data: Dict[str, float], target_planet_data: Dict[str, float]) -> Dict[str, float]:
         """
@@ -75,7 +236,122 @@ class Solar_System:
                     "y": (target_planet_data["y"] - origin_planet_data["y"])} 
     
     
-    def compute_angle_vs_time(self, t: np.ndarray, P: float, ecc: float, theta0: float) -> np.ndarray:
+    def third_law_fit(self, planet_names: Optional[List[str]] = None, outlier_threshold: float = 3.5) -> Dict[str, np.ndarray]:
+        """
+        Fit Kepler's third law, log10(P) = slope * log10(a) + intercept (slope is 1.5 for P in years and a in AU around a Sun-like star)
+        
+        The whole catalog is fitted in one least-squares solve. Outliers are planets whose residual is more than 
+        outlier_threshold robust standard deviations (1.4826 * median absolute deviation) from the median residual
+
+        Args:
+            planet_names (Optional[List[str]]): Planets to use (leave blank for all)\n
+            outlier_threshold (float): Robust z-score above which a planet is an outlier. Defaults to 3.5
+
+        Raises:
+            ValueError: Fewer than 2 planets with a > 0 and P > 0
+
+        Returns:
+            Dict: {names, a, P: the planets used (sorted by a),
+                   slope, intercept, r2: the fit,
+                   residuals: log10(P) - fitted log10(P),
+                   outliers: boolean mask}
+        """
+        
+        if planet_names is None:
+            # From the maintained index, so the result is sorted by a without sorting
+            planets = self.sorted_by("a")
+        else:
+            planets = sorted((self.planets[planet_name] for planet_name in planet_names), key=lambda planet: planet.a)
+        
+        a = np.fromiter((planet.a for planet in planets), dtype=float, count=len(planets))
+        P = np.fromiter((planet.P for planet in planets), dtype=float, count=len(planets))
+        
+        valid = (a > 0) & (P > 0)
+        if valid.sum() < 2:
+            raise ValueError("At least 2 planets with a > 0 and P > 0 are needed")
+        
+        names = np.array([planet.name for planet in planets], dtype=object)[valid]
+        a, P = a[valid], P[valid]
+        
+        log_a, log_P = np.log10(a), np.log10(P)
+        design = np.column_stack([log_a, np.ones_like(log_a)])
+        (slope, intercept), *_ = np.linalg.lstsq(design, log_P, rcond=None)
+        
+        residuals = log_P - (slope * log_a + intercept)
+        total = np.sum((log_P - log_P.mean()) ** 2)
+        r2 = 1 - np.sum(residuals ** 2) / total if total > 0 else 1.0
+        
+        deviation = np.abs(residuals - np.median(residuals))
+        scale = 1.4826 * np.median(deviation)
+        outliers = deviation > outlier_threshold * scale if scale > 0 else np.zeros(len(residuals), dtype=bool)
+        
+        return {"names": names,
+                "a": a,
+                "P": P,
+                "slope": float(slope),
+                "intercept": float(intercept),
+                "r2": float(r2),
+                "residuals": residuals,
+                "outliers": outliers}
+    
+    
+    def synodic_period(self, planet_a_name: str, planet_b_name: str) -> float:
+        """
+        Time between two consecutive alignments of two planets
+
+        Args:
+            planet_a_name (str): Name of a planet
+            planet_b_name (str): Name of another planet
+
+        Returns:
+            float: Synodic period (years), inf if both have the same period
+        """
+        
+        frequency = abs(1 / self.planets[planet_a_name].P - 1 / self.planets[planet_b_name].P)
+        
+        return 1 / frequency if frequency > 0 else np.inf
+    
+    
+    def repeat_period(self, planet_names: Optional[List[str]] = None, tolerance: float = 0.01, max_periods: int = 100) -> float:
+        """
+        Shortest time after which all the planets are back (within tolerance) where they started, 
+        i.e. the time it takes a pattern drawn with them (e.g. a spinograph) to close
+        
+        Candidates are the multiples of the slowest planet's period (1 to max_periods), the first one 
+        where every planet has done a whole number of orbits within tolerance is used. If none is 
+        close enough, the closest one is used and a RuntimeWarning is issued.
+
+        Args:
+            planet_names (Optional[List[str]]): Planets to use (leave blank for all)\n
+            tolerance (float): How far from a whole number of orbits (in orbits) a planet may be. Defaults to 0.01\n
+            max_periods (int): Most periods of the slowest planet to try. Defaults to 100
+
+        Returns:
+            float: Repeat period (years)
+        """
+        
+        if not planet_names:
+            planet_names = list(self.planets.keys())
+        
+        periods = np.array([self.planets[planet_name].P for planet_name in planet_names], dtype=float)
+        
+        candidates = periods.max() * np.arange(1, max_periods + 1)
+        
+        orbits = candidates[:, None] / periods[None, :]
+        mismatch = np.abs(orbits - np.round(orbits)).max(axis=1)
+        
+        closed = np.flatnonzero(mismatch <= tolerance)
+        if len(closed):
+            return candidates[closed[0]]
+        
+        best = np.argmin(mismatch)
+        warnings.warn(f"The pattern does not close within {max_periods} periods of the slowest planet (tolerance {tolerance} orbits), "
+                      f"using the closest match ({mismatch[best]:.3g} orbits off after {candidates[best]:.4g} years)", RuntimeWarning, stacklevel=2)
+        
+        return candidates[best]
+    
+    
+    def compute_angle_vs_time(self, t: np.ndarray, P: float, ecc: float, theta0: float, dtype: Optional[DTypeLike] = None) -> np.ndarray:
         """
         Calculate the polar angle as a function of time using Simpson's rule.
         
@@ -86,36 +362,120 @@ class Solar_System:
             P (float): Orbital period in years.
             ecc (float): Eccentricity of the orbit.
             theta0 (float): Initial polar angle in radians.
+            dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)
 
         Returns:
             np.ndarray: Array of polar angles corresponding to the input time values in radians.
         """
         
-        # Angle step for Simpson's rule
-        dtheta = 1 / 1000
+        # scipy is slow to import, only load it when it is needed
+        from scipy.interpolate import interp1d
+        
+        with span("solar_system.compute_angle_vs_time.integrate"):
+            dtype = resolve_dtype(dtype)
+            
+            # Angle step for Simpson's rule
+            dtheta = 1 / 1000
 
-        # Number of orbits
-        N = np.ceil(t[-1] / P)
+            # Number of orbits
+            N = np.ceil(t[-1] / P)
 
-        # Define array of polar angles for orbits
-        theta = np.arange(theta0, 2 * np.pi * N + theta0 + dtheta, dtheta)
+            # Define array of polar angles for orbits
+            # (theta and tt stay in float64: in float32 neighbouring values up to 2*pi*N collapse into duplicates)
+            theta = np.arange(theta0, 2 * np.pi * N + theta0 + dtheta, dtheta)
 
-        # Evaluate integrand of time integral
-        f = (1 - ecc * np.cos(theta)) ** -2
+            # Calculate array of times from the running Simpson's rule sum of the integrand
+            tt = P * (1 - ecc ** 2) ** (3 / 2) * (1 / (2 * np.pi)) * dtheta * (1 / 3) * simpson_cumsum(theta, ecc)
 
-        # Define Simpson's rule coefficients 
-        L = len(theta)
-        isodd = np.remainder(np.arange(1, L - 1), 2)
-        isodd[isodd == 1] = 4
-        isodd[isodd == 0] = 2
-        c = np.concatenate(([1], isodd, [1]))
+        with span("solar_system.compute_angle_vs_time.interpolate"):
+            # Interpolate the polar angles for the eccentric orbit at the circular orbit times, only the result is in dtype
+            theta_interp = interp1d(tt, theta, kind='cubic')
+            theta_result = theta_interp(np.asarray(t, dtype=np.float64)).astype(dtype, copy=False)
 
-        # Calculate array of times
-        tt = P * (1 - ecc ** 2) ** (3 / 2) * (1 / (2 * np.pi)) * dtheta * (1 / 3) * np.cumsum(c * f)
+        return theta_result
+    
+    
+    def find_events(self, kind: str = "conjunction", planet_names: Optional[List[str]] = None, t_start: float = 0, t_end: float = 100, samples_per_period: int = 20, compute_3D: bool = False, block_size: int = DEFAULT_BLOCK_SIZE) -> Dict[Tuple[str, str], np.ndarray]:
+        """
+        Find the times of conjunctions, oppositions or close approaches between every pair of planets
+        
+        All pairs are sampled at once on a coarse grid (in blocks, so long spans use bounded memory), 
+        then every bracketed event is refined with root finding (conjunction, opposition) or 
+        bounded minimisation (closest).
 
-        # Interpolate the polar angles for the eccentric orbit at the circular orbit times
-        theta_interp = interp1d(tt, theta, kind='cubic')
-        theta_result = theta_interp(t)
+        Args:
+            kind (str): "conjunction" (same longitude), "opposition" (longitudes pi apart) or "closest" (minimum separation). Defaults to "conjunction"\n
+            planet_names (Optional[List[str]]): Planets to use (leave blank for all)\n
+            t_start (float): Start of the search (years). Defaults to 0\n
+            t_end (float): End of the search (years). Defaults to 100\n
+            samples_per_period (int): Grid points per orbit of the fastest planet. Defaults to 20\n
+            compute_3D (bool): Use the 3D positions for the separation (longitudes always use x and y)\n
+            block_size (int): Grid points evaluated at a time
+
+        Raises:
+            ValueError: kind is not one of EVENT_KINDS
+
+        Returns:
+            Dict[Tuple[str, str], np.ndarray]: {(planet name, planet name): sorted event times (years)}
+        """
+        
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"{kind} not supported, use one of {EVENT_KINDS}")
+        
+        # scipy is slow to import, only load it when it is needed
+        from scipy.optimize import brentq, minimize_scalar
+        
+        if not planet_names:
+            planet_names = list(self.planets.keys())
+        
+        planets = [self.planets[planet_name] for planet_name in planet_names]
+        first, second = np.triu_indices(len(planets), k=1)
+        
+        # Relative longitude changes by less than 2*pi/samples_per_period per step
+        dt = min(planet.P for planet in planets) / samples_per_period
+        num_points = int(np.ceil((t_end - t_start) / dt)) + 1
+        
+        def pair_value(t: float, i: int, j: int) -> float:
+            positions = compute_positions(planets=[planets[i], planets[j]], t=t, compute_3D=compute_3D)
+            return _event_values(kind, positions, np.array([0]), np.array([1]))[0, 0]
+        
+        events = [[] for _ in first]
+        previous_t = previous_values = None
+        
+        with span("solar_system.find_events.scan"):
+            for t, positions in iter_position_blocks(planets=planets, t_start=t_start, dt=dt, num_points=num_points, compute_3D=compute_3D, block_size=block_size):
+                values = _event_values(kind, positions, first, second)
+                
+                # Overlap with the end of the previous block, so events between blocks are found
+                overlap = 0
+                if previous_t is not None:
+                    overlap = len(previous_t)
+                    t = np.concatenate([previous_t, t])
+                    values = np.concatenate([previous_values, values], axis=1)
+                
+                if kind == "closest":
+                    is_minimum = (values[:, 1:-1] < values[:, :-2]) & (values[:, 1:-1] <= values[:, 2:])
+                    pair, k = np.nonzero(is_minimum)
+                    k += 1
+                    brackets = zip(pair, t[k - 1], t[k + 1])
+                else:
+                    # Sign change, ignoring the jumps from wrapping at +-pi
+                    crossing = ((values[:, :-1] == 0) | (values[:, :-1] * values[:, 1:] < 0)) & (np.abs(values[:, 1:] - values[:, :-1]) < np.pi)
+                    # The first step of the overlap was checked with the previous block
+                    if overlap:
+                        crossing[:, 0] = False
+                    pair, k = np.nonzero(crossing)
+                    brackets = zip(pair, t[k], t[k + 1])
+                
+                for p, low, high in brackets:
+                    i, j = first[p], second[p]
+                    if kind == "closest":
+                        refined = minimize_scalar(pair_value, bounds=(low, high), args=(i, j), method="bounded", options={"xatol": 1e-9}).x
+                    else:
+                        refined = brentq(pair_value, low, high, args=(i, j), xtol=1e-12)
+                    events[p].append(refined)
+                
+                previous_t, previous_values = t[-2:], values[:, -2:]
+        
+        return {(planet_names[i], planet_names[j]): np.sort(np.array(times)) for i, j, times in zip(first, second, events)}
 
-        return theta_result
-            
@@ -0,0 +1,204 @@
+"""
+Spatial index (KD-tree) over the positions of the planets at a given time
+
+Answers "which bodies are within r of X" and "the k bodies nearest to X" in sublinear time.
+An index built at time t can also answer queries at nearby times: every planet moves at 
+most max_speed * |dt|, so the stale tree is searched with a radius inflated by that drift 
+and only the candidates are re-evaluated exactly at the new time.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from solarkit.planet import Planet
+from solarkit.solar_system import Solar_System
+from solarkit.ephemeris import compute_positions, orbital_elements
+
+
+def max_speeds(planets: List[Planet]) -> np.ndarray:
+    """
+    Upper bound of the speed of every planet (AU/year)
+    
+    With theta = 2*pi*t/P and r = a(1 - e^2) / (1 - e cos(theta)): r <= a(1 + e) and 
+    |dr/dtheta| <= a e (1 + e) / (1 - e), so |v| <= 2*pi/P * (r + |dr/dtheta|). Rotations keep lengths.
+
+    Args:
+        planets (List[Planet]): Planets to use
+
+    Returns:
+        np.ndarray: Speed bounds, shape (number of planets,)
+    """
+    
+    elements = orbital_elements(planets, dtype=np.float64)
+    a, ecc = elements["a"], elements["ecc"]
+    
+    return 2 * np.pi / elements["P"] * (a * (1 + ecc) + a * ecc * (1 + ecc) / (1 - ecc))
+
+
+@dataclass
+class PositionIndex:
+    """
+    KD-tree over the positions of planets at time t
+
+    Args:
+        planets (List[Planet]): Planets to index\n
+        t (float): Time of the positions (years)\n
+        compute_3D (bool): Index the 3D positions, else x and y only. Defaults to True
+    """
+    
+    planets: List[Planet]
+    t: float
+    compute_3D: bool = field(default=True)
+    
+    positions: np.ndarray = field(init=False, repr=False)
+    speeds: np.ndarray = field(init=False, repr=False)
+    tree: object = field(init=False, repr=False)
+    
+    
+    def __post_init__(self) -> None:
+        # scipy is slow to import, only load it when it is needed
+        from scipy.spatial import cKDTree
+        
+        self.positions = self._positions_at(self.planets, self.t)
+        self.speeds = max_speeds(self.planets)
+        self.tree = cKDTree(self.positions)
+        self._names = {planet.name: i for i, planet in enumerate(self.planets)}
+    
+    
+    def __len__(self) -> int:
+        return len(self.planets)
+    
+    
+    @classmethod
+    def build(cls, system: Solar_System, t: float, compute_3D: bool = True, planet_names: Optional[List[str]] = None) -> "PositionIndex":
+        """
+        Index the planets of a system
+
+        Args:
+            system (Solar_System): The system\n
+            t (float): Time of the positions (years)\n
+            compute_3D (bool): Index the 3D positions, else x and y only. Defaults to True\n
+            planet_names (Optional[List[str]]): Planets to use (leave blank for all)
+
+        Returns:
+            PositionIndex: The index
+        """
+        
+        if not planet_names:
+            planet_names = list(system.planets.keys())
+        
+        return cls(planets=[system.planets[planet_name] for planet_name in planet_names], t=t, compute_3D=compute_3D)
+    
+    
+    def refresh(self, t: float, max_drift: float) -> "PositionIndex":
+        """
+        Index for time t: this one if no planet can have moved more than max_drift since it was built, else a new one
+
+        Args:
+            t (float): Time of the queries (years)\n
+            max_drift (float): Largest distance (AU) the stale positions may be off by
+
+        Returns:
+            PositionIndex: An index that can answer queries at t
+        """
+        
+        if self.speeds.max(initial=0) * abs(t - self.t) <= max_drift:
+            return self
+        
+        return PositionIndex(planets=self.planets, t=t, compute_3D=self.compute_3D)
+    
+    
+    def _positions_at(self, planets: List[Planet], t: float) -> np.ndarray:
+        # (number of planets, dims)
+        return compute_positions(planets=planets, t=t, compute_3D=self.compute_3D)[..., 0].T
+    
+    
+    def _centre(self, centre: Union[str, np.ndarray], t: float) -> Tuple[np.ndarray, Optional[int]]:
+        if isinstance(centre, str):
+            if centre not in self._names:
+                raise KeyError(f"{centre} not found")
+            
+            i = self._names[centre]
+            
+            return self._positions_at([self.planets[i]], t)[0], i
+        
+        return np.asarray(centre, dtype=float), None
+    
+    
+    def _exact(self, candidates: np.ndarray, point: np.ndarray, t: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact distances of the candidates to point at time t
+        """
+        
+        candidates = np.asarray(candidates, dtype=int)
+        
+        if t == self.t:
+            positions = self.positions[candidates]
+        else:
+            positions = self._positions_at([self.planets[i] for i in candidates], t).reshape(len(candidates), self.positions.shape[1])
+        
+        return candidates, np.linalg.norm(positions - point, axis=1)
+    
+    
+    def within(self, centre: Union[str, np.ndarray], radius: float, t: Optional[float] = None) -> List[Tuple[Planet, float]]:
+        """
+        Planets within radius of centre
+
+        Args:
+            centre (Union[str, np.ndarray]): A planet name (it is left out of the results) or a point\n
+            radius (float): Search radius (AU)\n
+            t (Optional[float]): Time of the query (leave blank for the index time)
+
+        Returns:
+            List[Tuple[Planet, float]]: (planet, distance) sorted by distance
+        """
+        
+        t = self.t if t is None else t
+        point, own = self._centre(centre, t)
+        
+        drift = self.speeds.max(initial=0) * abs(t - self.t)
+        candidates = [i for i in self.tree.query_ball_point(point, radius + drift) if i != own]
+        
+        candidates, distances = self._exact(candidates, point, t)
+        inside = distances <= radius
+        order = np.argsort(distances[inside])
+        
+        return [(self.planets[i], float(d)) for i, d in zip(candidates[inside][order], distances[inside][order])]
+    
+    
+    def nearest(self, centre: Union[str, np.ndarray], k: int = 1, t: Optional[float] = None) -> List[Tuple[Planet, float]]:
+        """
+        The k planets nearest to centre
+
+        Args:
+            centre (Union[str, np.ndarray]): A planet name (it is left out of the results) or a point\n
+            k (int): Number of planets. Defaults to 1\n
+            t (Optional[float]): Time of the query (leave blank for the index time)
+
+        Returns:
+            List[Tuple[Planet, float]]: (planet, distance) sorted by distance
+        """
+        
+        t = self.t if t is None else t
+        point, own = self._centre(centre, t)
+        
+        extra = 0 if own is None else 1
+        n = min(k + extra, len(self.planets))
+        if n == 0:
+            return []
+        
+        distances, candidates = self.tree.query(point, k=n)
+        candidates = [i for i in np.atleast_1d(candidates) if i != own][:k]
+        
+        if t != self.t and candidates:
+            # The true k nearest at t are at most (k-th stale distance + 2 * drift) away in the stale tree
+            drift = self.speeds.max(initial=0) * abs(t - self.t)
+            stale_kth = np.linalg.norm(self.positions[candidates[-1]] - point)
+            candidates = [i for i in self.tree.query_ball_point(point, stale_kth + 2 * drift) if i != own]
+        
+        candidates, distances = self._exact(candidates, point, t)
+        order = np.argsort(distances)[:k]
+        
+        return [(self.planets[i], float(d)) for i, d in zip(candidates[order], distances[order])]
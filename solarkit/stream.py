@@ -0,0 +1,119 @@
+"""
+Stream planet positions as chunks of frames (e.g. to push them to live clients over websockets)
+
+Frames are only computed when the consumer asks for the next chunk, so a slow consumer 
+naturally slows down the producer (backpressure) and memory stays at one chunk.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+
+from solarkit.planet import Planet
+from solarkit.ephemeris import iter_position_blocks
+from solarkit.precision import DTypeLike
+
+
+@dataclass
+class FrameChunk:
+    """
+    A block of consecutive animation frames
+
+    Args:
+        index (int): Index of the first frame in the chunk\n
+        t (np.ndarray): Time of each frame, shape (frames,)\n
+        positions (np.ndarray): Positions, shape (2 or 3, number of planets, frames)\n
+        names (List[str]): Planet names, in the same order as positions\n
+        colours (List[str]): Planet colours, in the same order as positions
+    """
+    
+    index: int
+    t: np.ndarray
+    positions: np.ndarray
+    names: List[str]
+    colours: List[str]
+    
+    def __len__(self) -> int:
+        return len(self.t)
+    
+    @property
+    def x(self) -> np.ndarray:
+        return self.positions[0]
+    
+    @property
+    def y(self) -> np.ndarray:
+        return self.positions[1]
+    
+    @property
+    def z(self) -> Optional[np.ndarray]:
+        return self.positions[2] if len(self.positions) == 3 else None
+
+
+def frame_count(t_start: float, t_end: float, dt: float) -> int:
+    """
+    Returns:
+        int: Number of frames between t_start (included) and t_end (excluded)
+    """
+    
+    return max(int(np.ceil((t_end - t_start) / dt)), 0)
+
+
+def iter_frames(planets: List[Planet], t_start: float, t_end: float, dt: float, chunk_size: int = 256, compute_3D: bool = False, dtype: Optional[DTypeLike] = None) -> Iterator[FrameChunk]:
+    """
+    Yield the positions of the planets from t_start to t_end in chunks of chunk_size frames
+
+    Args:
+        planets (List[Planet]): Planets to use\n
+        t_start (float): Time of the first frame (years)\n
+        t_end (float): End time, excluded (years)\n
+        dt (float): Time between frames (years)\n
+        chunk_size (int): Frames per chunk. Defaults to 256\n
+        compute_3D (bool): Compute the positions using beta (inclination)\n
+        dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)
+
+    Yields:
+        FrameChunk: Next block of frames (the last one may be shorter)
+    """
+    
+    names = [planet.name for planet in planets]
+    colours = [planet.colour for planet in planets]
+    n_frames = frame_count(t_start=t_start, t_end=t_end, dt=dt)
+    
+    blocks = iter_position_blocks(planets=planets, t_start=t_start, dt=dt, num_points=n_frames, compute_3D=compute_3D, block_size=chunk_size, dtype=dtype)
+    for i, (t, positions) in enumerate(blocks):
+        yield FrameChunk(index=i * chunk_size,
+                         t=t,
+                         positions=positions,
+                         names=names,
+                         colours=colours)
+
+
+async def aiter_frames(planets: List[Planet], t_start: float, t_end: float, dt: float, chunk_size: int = 256, compute_3D: bool = False, dtype: Optional[DTypeLike] = None) -> AsyncIterator[FrameChunk]:
+    """
+    Async version of iter_frames (use with `async for`). Each chunk is computed on a worker thread
+    (asyncio.to_thread), so the event loop keeps serving other tasks meanwhile
+
+    Args:
+        planets (List[Planet]): Planets to use\n
+        t_start (float): Time of the first frame (years)\n
+        t_end (float): End time, excluded (years)\n
+        dt (float): Time between frames (years)\n
+        chunk_size (int): Frames per chunk. Defaults to 256\n
+        compute_3D (bool): Compute the positions using beta (inclination)\n
+        dtype (Optional[DTypeLike]): np.float32 or np.float64 (leave blank for the default, see solarkit.precision)
+
+    Yields:
+        FrameChunk: Next block of frames (the last one may be shorter)
+    """
+    
+    chunks = iter_frames(planets=planets, t_start=t_start, t_end=t_end, dt=dt, chunk_size=chunk_size, compute_3D=compute_3D, dtype=dtype)
+    
+    # One chunk at a time, so backpressure still applies
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            return
+        
+        yield chunk
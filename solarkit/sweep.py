@@ -0,0 +1,149 @@
+"""
+Parameter sweeps of Solar_System.compute_angle_vs_time over a process pool
+
+Every (P, ecc, theta0) combination is an independent integration, so the grid is split 
+into chunks that run in parallel. Results are collected into one labelled array and can be 
+checkpointed to a .npz file, so a long sweep can be resumed after being interrupted.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from solarkit.kernels import process_context, warm_up
+from solarkit.solar_system import Solar_System
+
+
+DIMS = ("P", "ecc", "theta0", "t")
+
+
+def _evaluate_chunk(t: np.ndarray, parameters: List[tuple]) -> np.ndarray:
+    """
+    Run compute_angle_vs_time for every (P, ecc, theta0) in parameters (runs in a worker process)
+    """
+    
+    system = Solar_System()
+    
+    return np.stack([system.compute_angle_vs_time(t=t, P=P, ecc=ecc, theta0=theta0) for P, ecc, theta0 in parameters])
+
+
+def save_sweep(result: Dict[str, np.ndarray], path: str) -> None:
+    """
+    Save a sweep (or a checkpoint) to a .npz file. Written to a temporary file first, so an interrupted save never corrupts it
+
+    Args:
+        result (Dict[str, np.ndarray]): As returned by run_angle_sweep\n
+        path (str): Path of the .npz file
+    """
+    
+    temporary = f"{path}.tmp.npz"
+    np.savez(temporary, **result)
+    os.replace(temporary, path)
+
+
+def load_sweep(path: str) -> Dict[str, np.ndarray]:
+    """
+    Load a sweep saved with save_sweep
+
+    Args:
+        path (str): Path of the .npz file
+
+    Returns:
+        Dict[str, np.ndarray]: As returned by run_angle_sweep
+    """
+    
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def run_angle_sweep(t: np.ndarray, P: Sequence[float], ecc: Sequence[float], theta0: Sequence[float] = (0,), workers: Optional[int] = None, chunk_size: int = 8, checkpoint: Optional[str] = None, checkpoint_every: float = 10) -> Dict[str, np.ndarray]:
+    """
+    Compute the polar angle vs time for every combination of P, ecc and theta0
+
+    Args:
+        t (np.ndarray): Array of time values (years)\n
+        P (Sequence[float]): Orbital periods to sweep (years)\n
+        ecc (Sequence[float]): Eccentricities to sweep\n
+        theta0 (Sequence[float]): Initial polar angles to sweep (rad). Defaults to (0,)\n
+        workers (Optional[int]): Worker processes (None for one per CPU, 0 to run in this process)\n
+        chunk_size (int): Grid points per task. Defaults to 8\n
+        checkpoint (Optional[str]): .npz file to save partial results to, and resume from if it exists\n
+        checkpoint_every (float): Least seconds between checkpoint saves. Defaults to 10
+
+    Raises:
+        ValueError: The checkpoint was made with a different grid
+
+    Returns:
+        Dict[str, np.ndarray]: {theta: polar angles of shape (len(P), len(ecc), len(theta0), len(t)),
+                                P, ecc, theta0, t: the coordinates of each axis,
+                                dims: axis names ("P", "ecc", "theta0", "t"),
+                                done: bool array of shape (len(P), len(ecc), len(theta0)), all True when finished}
+    """
+    
+    coords = {"P": np.asarray(P, dtype=float),
+              "ecc": np.asarray(ecc, dtype=float),
+              "theta0": np.asarray(theta0, dtype=float),
+              "t": np.asarray(t, dtype=float)}
+    grid_shape = (len(coords["P"]), len(coords["ecc"]), len(coords["theta0"]))
+    
+    if checkpoint is not None and os.path.exists(checkpoint):
+        result = load_sweep(checkpoint)
+        
+        for key, values in coords.items():
+            if result[key].shape != values.shape or not np.array_equal(result[key], values):
+                raise ValueError(f"{checkpoint} was made with a different {key} grid")
+    else:
+        result = dict(coords,
+                      theta=np.full(grid_shape + (len(coords["t"]),), np.nan),
+                      dims=np.array(DIMS),
+                      done=np.zeros(grid_shape, dtype=bool))
+    
+    # Flat indices of the grid points still to compute, split into tasks
+    todo = np.flatnonzero(~result["done"].ravel())
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    
+    def parameters(chunk: np.ndarray) -> List[tuple]:
+        i, j, k = np.unravel_index(chunk, grid_shape)
+        return list(zip(coords["P"][i], coords["ecc"][j], coords["theta0"][k]))
+    
+    last_save = time.monotonic()
+    
+    def store(chunk: np.ndarray, values: np.ndarray) -> None:
+        nonlocal last_save
+        
+        index = np.unravel_index(chunk, grid_shape)
+        result["theta"][index] = values
+        result["done"][index] = True
+        
+        if checkpoint is not None and time.monotonic() - last_save >= checkpoint_every:
+            save_sweep(result, checkpoint)
+            last_save = time.monotonic()
+    
+    try:
+        if workers == 0:
+            for chunk in chunks:
+                store(chunk, _evaluate_chunk(coords["t"], parameters(chunk)))
+        else:
+            # Load the compiled kernels once per worker, not inside the first task (see kernels.warm_up)
+            with ProcessPoolExecutor(max_workers=workers, initializer=warm_up, mp_context=process_context()) as executor:
+                futures = {executor.submit(_evaluate_chunk, coords["t"], parameters(chunk)): chunk for chunk in chunks}
+                
+                try:
+                    for future in as_completed(futures):
+                        store(futures[future], future.result())
+                except BaseException:
+                    # Drop the queued tasks instead of waiting for all of them, and keep the ones that finished meanwhile
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    for future, chunk in futures.items():
+                        if future.done() and not future.cancelled() and future.exception() is None:
+                            store(chunk, future.result())
+                    raise
+    finally:
+        # Also after an error, so a resumed sweep does not redo what was computed
+        if checkpoint is not None:
+            save_sweep(result, checkpoint)
+    
+    return result
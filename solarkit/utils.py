@@ -1,12 +1,20 @@
 import pickle
-
-import pandas as pd
+from typing import TYPE_CHECKING, Iterator, List, Optional
 
 from solarkit.planet import Planet
 from solarkit.solar_system import Solar_System
 
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow.dataset as ds
+
+
+# Columns a Planet needs, and the optional ones (orientation, see Planet)
+PLANET_COLUMNS = ("name", "m", "a", "ecc", "beta", "R", "trot", "P", "colour")
+OPTIONAL_PLANET_COLUMNS = ("lan", "argp")
 
-def create_planet(planet_data: pd.Series(object)) -> Planet:
+
+def create_planet(planet_data: "pd.Series") -> Planet:
     
     """
     Creates a planet from a pd.Series(object) containing the required data (reference Planet object parameters)
@@ -23,7 +31,9 @@ def create_planet(planet_data: pd.Series(object)) -> Planet:
                                 R=planet_data["R"],
                                 trot=planet_data["trot"],
                                 P=planet_data["P"],
-                                colour=planet_data["colour"],)
+                                colour=planet_data["colour"],
+                                lan=planet_data.get("lan"),
+                                argp=planet_data.get("argp"))
     
     return new_planet
 
@@ -38,6 +48,9 @@ def load_system_from_csv(path: str):
         Solar_System: Solar system object
     """
     
+    # pandas is slow to import, only load it when it is needed
+    import pandas as pd
+    
     system_data = pd.read_csv(path)
     system = Solar_System()
     
@@ -50,6 +63,69 @@ def load_system_from_csv(path: str):
 
 
 
+def iter_planets_from_dataset(path: str, file_format: str = "parquet", row_filter: Optional["ds.Expression"] = None, batch_size: int = 65536) -> Iterator[List[Planet]]:
+    """
+    Reads planets from a Parquet/Feather (Arrow IPC) file or directory, a batch at a time
+    
+    Only the columns a Planet needs are read (e.g. b is skipped), and rows are filtered while 
+    scanning: a > 0 always (as in Solar_System.add), combined with row_filter if given
+
+    Args:
+        path (str): The path to a file or a directory of files\n
+        file_format (str): "parquet", "feather" or "ipc". Defaults to "parquet"\n
+        row_filter (Optional[ds.Expression]): Extra row predicate, e.g. pyarrow.dataset.field("P") < 1000\n
+        batch_size (int): Most rows read at a time
+
+    Yields:
+        List[Planet]: The planets of a batch
+    """
+    
+    # pyarrow is an optional dependency (pip install solarkit[parquet]), only load it when it is needed
+    import pyarrow.dataset as ds
+    
+    dataset = ds.dataset(path, format=file_format)
+    
+    missing = [column for column in PLANET_COLUMNS if column not in dataset.schema.names]
+    if missing:
+        raise ValueError(f"{path} is missing the columns {missing}")
+    
+    optional = [column for column in OPTIONAL_PLANET_COLUMNS if column in dataset.schema.names]
+    
+    predicate = ds.field("a") > 0
+    if row_filter is not None:
+        predicate = predicate & row_filter
+    
+    for batch in dataset.to_batches(columns=list(PLANET_COLUMNS) + optional, filter=predicate, batch_size=batch_size):
+        if not batch.num_rows:
+            continue
+        
+        columns = {name: batch.column(name).to_pylist() for name in batch.schema.names}
+        for column in OPTIONAL_PLANET_COLUMNS:
+            columns.setdefault(column, [None] * batch.num_rows)
+        
+        yield [Planet(**dict(zip(columns, row))) for row in zip(*columns.values())]
+
+
+def load_system_from_parquet(path: str, file_format: str = "parquet", row_filter: Optional["ds.Expression"] = None, batch_size: int = 65536) -> Solar_System:
+    """
+    Creates a system from a Parquet/Feather (Arrow IPC) file or directory, see iter_planets_from_dataset
+
+    Args:
+        path (str): The path to a file or a directory of files\n
+        file_format (str): "parquet", "feather" or "ipc". Defaults to "parquet"\n
+        row_filter (Optional[ds.Expression]): Extra row predicate, e.g. pyarrow.dataset.field("P") < 1000\n
+        batch_size (int): Most rows read at a time
+
+    Returns:
+        Solar_System: Solar system object
+    """
+    
+    system = Solar_System()
+    
+    for planets in iter_planets_from_dataset(path=path, file_format=file_format, row_filter=row_filter, batch_size=batch_size):
+        system.extend(planets)
+    
+    return system
 
 
 def save_system(model: Solar_System) -> None:
@@ -1,5 +1,6 @@
+import warnings
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Iterator, AsyncIterator, Callable
 import os
 from io import StringIO
 
@@ -9,6 +10,16 @@ import numpy as np
 
 from solarkit.solar_system import Solar_System
 from solarkit.planet import Planet
+from solarkit.instrumentation import span
+from solarkit.export import pack_geometry, write_geometry
+from solarkit.stream import FrameChunk, iter_frames, aiter_frames, frame_count
+from solarkit.ephemeris import DEFAULT_BLOCK_SIZE, CurveCollector, DensityRaster, evaluate_chunked, compute_positions, orbital_elements, place_on_orbits
+from solarkit.decimate import rdp_mask, cull_lines_mask
+from solarkit.precision import DTypeLike, resolve_dtype
+
+
+# Resolution of save_figure
+SAVE_DPI = 250
 
 
 @dataclass
@@ -21,15 +32,30 @@ class Viewer:
         planets_to_use (List[str]): Select speficif planets (leave blank for all)\n
         compute_3D (bool): Show in 3D\n
         target_fps (int): Animation's fps\n
+        decimate_px (Optional[float]): Drop curve vertices closer than this (in pixels of the saved image) to the drawn line, 2D only (leave blank to draw every point)\n
+        output_dpi (Optional[float]): Resolution the figure will be saved at, decimate_px is measured at it (leave blank for SAVE_DPI, the resolution of save_figure)\n
+        dtype (Optional[DTypeLike]): Compute in np.float32 or np.float64 (leave blank for the default, see solarkit.precision)\n
+        workers (Optional[int]): Threads to compute large position grids with (None for one per CPU, see ephemeris.positions_threaded). Defaults to 1\n
+        lod_threshold (Optional[int]): Above this many planets, draw orbits and planets as one density image instead of one artist each, 2D only (leave blank to never do it)\n
+        raster_bins (int): Bins per axis of the density image. Defaults to 512\n
+        hexbin_threshold (Optional[int]): Above this many planets, third_law draws a hexbin density instead of one marker each (leave blank to never do it). Defaults to 5000\n
     """
     
     system: Solar_System
     planets_to_use: List[str] = field(default_factory=list)
     compute_3D: Optional[bool] = field(default= False)
     target_fps: Optional[int] = field(default=30)
+    decimate_px: Optional[float] = field(default=None)
+    output_dpi: Optional[float] = field(default=None)
+    dtype: Optional[DTypeLike] = field(default=None)
+    workers: Optional[int] = field(default=1)
+    lod_threshold: Optional[int] = field(default=None)
+    raster_bins: int = field(default=512)
+    hexbin_threshold: Optional[int] = field(default=5000)
     
-    orbit_data: Dict[str, Dict[str, List[float]]] = field(init=False, default_factory=dict)
     chosen_planets: List[Planet] = field(init=False, default=list)
+    _orbit_cache: Dict[str, Dict[str, List[float]]] = field(init=False, repr=False, default_factory=dict)
+    _orbit_cache_key: tuple = field(init=False, repr=False, default=None)
     
     
     fig: plt.figure = field(init=False)
@@ -43,19 +69,117 @@ class Viewer:
     def __post_init__(self) -> None:
         
         if not self.planets_to_use:
-            self.planets_to_use = list(self.system.planets.keys())
-            
-        
-        self.system.planets = dict(sorted(self.system.planets.items(), key=lambda planet: planet[1].P))
+            # Sorted by period, without reordering the (possibly shared) system
+            self.planets_to_use = [planet.name for planet in self.system.sorted_by("P")]
         
+        self.planets_to_use = list(self.planets_to_use)
         self.chosen_planets = list(map(self.system.planets.get, self.planets_to_use))
         
-        self.orbit_data = [planet.compute_orbit(compute_3D=self.compute_3D) for planet in self.chosen_planets]
-
+        self.update_timescale()
     
+    @property
+    def orbit_data(self) -> List[Dict[str, List[float]]]:
+        """
+        Orbits of the chosen planets (see Planet.compute_orbit), computed the first time they are needed and cached
+        """
+        
+        # Cached orbits are only valid for the settings they were computed with
+        if self._orbit_cache_key != (self.compute_3D, self.dtype):
+            self._orbit_cache = {}
+            self._orbit_cache_key = (self.compute_3D, self.dtype)
+        
+        missing = [planet for planet in self.chosen_planets if planet.name not in self._orbit_cache]
+        if missing:
+            with span("viewer.compute_orbits"):
+                for planet in missing:
+                    self._orbit_cache[planet.name] = planet.compute_orbit(compute_3D=self.compute_3D, dtype=self.dtype)
+        
+        return [self._orbit_cache[planet.name] for planet in self.chosen_planets]
+
+    def preload_orbits(self, orbit_data: List[Dict[str, np.ndarray]]) -> None:
+        """
+        Use orbits computed elsewhere instead of computing them (e.g. shared.SharedSystem.orbit_data)
+
+        Args:
+            orbit_data (List[Dict]): Orbits in the format of Planet.compute_orbit, computed with this Viewer's compute_3D and dtype
+
+        Raises:
+            ValueError: The orbits are 3D and the Viewer is not, or the other way round
+        """
+
+        for orbit in orbit_data:
+            if ("z" in orbit) != bool(self.compute_3D):
+                raise ValueError(f"{orbit['name']}'s orbit is {'3D' if 'z' in orbit else '2D'}, the Viewer is not")
+
+        # Make sure the cache is for the current settings before filling it
+        if self._orbit_cache_key != (self.compute_3D, self.dtype):
+            self._orbit_cache = {}
+            self._orbit_cache_key = (self.compute_3D, self.dtype)
+
+        self._orbit_cache.update((orbit["name"], orbit) for orbit in orbit_data)
+
+    def update_timescale(self) -> None:
+        """
+        Set tmax and dt from the chosen planets (4 orbits of the last chosen planet, 2500 steps)
+        """
         
         self.tmax = 4 * self.chosen_planets[-1].P
         self.dt = self.tmax/2500
+    
+    def add_planet(self, planet_name: str, index: Optional[int] = None) -> None:
+        """
+        Add a planet to the chosen planets, keeping the orbits already computed for the others
+        
+        Leaves the viewer as a new Viewer with the same planets_to_use would be (except for self.t, which is kept)
+
+        Args:
+            planet_name (str): Planet name (from planets in self.system.planets)\n
+            index (Optional[int]): Position in planets_to_use (leave blank to add it at the end)
+
+        Raises:
+            KeyError: Planet name not found in self.system.planets
+        """
+        
+        try:
+            planet = self.system.planets[planet_name]
+        except KeyError:
+            raise KeyError(f"{planet_name} not found")
+        
+        if planet_name in self.planets_to_use:
+            return
+        
+        if index is None:
+            index = len(self.planets_to_use)
+        
+        self.planets_to_use.insert(index, planet_name)
+        self.chosen_planets.insert(index, planet)
+        
+        self.update_timescale()
+    
+    def remove_planet(self, planet_name: str) -> None:
+        """
+        Remove a planet from the chosen planets, keeping the orbits already computed for the others
+
+        Args:
+            planet_name (str): Name of a chosen planet
+
+        Raises:
+            KeyError: Planet name not in planets_to_use\n
+            ValueError: It is the only chosen planet
+        """
+        
+        if planet_name not in self.planets_to_use:
+            raise KeyError(f"{planet_name} not found")
+        
+        if len(self.planets_to_use) == 1:
+            raise ValueError("A Viewer needs at least one planet")
+        
+        index = self.planets_to_use.index(planet_name)
+        del self.planets_to_use[index]
+        del self.chosen_planets[index]
+        self._orbit_cache.pop(planet_name, None)
+        
+        self.update_timescale()
         
     def __str__(self) -> str:
         return f"Planets: {self.system.__str__()}\n3D: {self.compute_3D}\nAnimation FPS: {self.target_fps}"
@@ -154,7 +278,8 @@ class Viewer:
         if not os.path.exists(path):
             os.mkdir(path)
         
-        plt.savefig(f"{path}/{filename}", dpi=250)
+        with span("viewer.save_figure"):
+            plt.savefig(f"{path}/{filename}", dpi=SAVE_DPI)
         
     def get_figure_data(self, dpi: int = 1000) -> str:
         """
@@ -167,11 +292,108 @@ class Viewer:
             str: Figure data to be embedded in html
         """
         
-        imgdata = StringIO()
-        self.fig.savefig(imgdata, format='svg', dpi=dpi)
-        imgdata.seek(0)
+        with span("viewer.get_figure_data.serialize"):
+            imgdata = StringIO()
+            self.fig.savefig(imgdata, format='svg', dpi=dpi)
+            imgdata.seek(0)
+            
+            return imgdata.getvalue()
+    
+    
+    def get_geometry_data(self, origin_planet_name: Optional[str] = None, lines_drawn: Optional[int] = 1234, num_points: int = 3000) -> Tuple[bytes, Dict]:
+        """
+        Get the raw geometry of the chosen planets (to draw it client side, instead of an image)
+        
+        Uses the same time spans as spinograph and heliocentric_model, but does not change self.t/self.tmax
+
+        Args:
+            origin_planet_name (Optional[str]): Centre planet for the heliocentric layer (leave blank to skip it)\n
+            lines_drawn (Optional[int]): Lines in the spinograph layer (None to skip it). Defaults to 1234\n
+            num_points (int): Points per planet in the heliocentric layer. Defaults to 3000
+
+        Returns:
+            Tuple[bytes, Dict]: Little-endian float32 buffer and its manifest (names, colours, offsets, see export.pack_geometry)
+        """
+        
+        with span("viewer.get_geometry_data.compute"):
+            layers = {"orbits": self.orbit_data}
+            
+            if lines_drawn:
+                dt, num_points = self._spinograph_grid(t_end=10 * self.tmax, span_length=10 * self.tmax, lines_drawn=lines_drawn)
+                lines = self.compute_spinograph(t=self.t + dt * np.arange(num_points))
+                layers["spinograph"] = [dict(lines, name="Spinograph", c="k")]
+            
+            if origin_planet_name is not None:
+                dt = 20 * self.tmax / num_points
+                layers["heliocentric"] = self.compute_heliocentric(origin_planet_name=origin_planet_name, t=self.t + dt * np.arange(num_points))
+        
+        with span("viewer.get_geometry_data.serialize"):
+            buffer, manifest = pack_geometry(layers=layers, dims=3 if self.compute_3D else 2)
+            
+            if origin_planet_name is not None:
+                manifest["centre"] = {"name": origin_planet_name, "colour": self.system.planets[origin_planet_name].colour}
+            
+        return buffer, manifest
+    
+    def export_geometry(self, path: str, filename: str, origin_planet_name: Optional[str] = None, lines_drawn: Optional[int] = 1234, num_points: int = 3000) -> None:
+        """
+        Save the raw geometry as {path}/{filename}.bin (little-endian float32) and {path}/{filename}.json (manifest)
+
+        Args:
+            path (str): directory where the files will be stored\n
+            filename (str): name of the files (without extension)\n
+            origin_planet_name (Optional[str]): Centre planet for the heliocentric layer (leave blank to skip it)\n
+            lines_drawn (Optional[int]): Lines in the spinograph layer (None to skip it). Defaults to 1234\n
+            num_points (int): Points per planet in the heliocentric layer. Defaults to 3000
+        """
+        
+        buffer, manifest = self.get_geometry_data(origin_planet_name=origin_planet_name, lines_drawn=lines_drawn, num_points=num_points)
+        
+        write_geometry(buffer=buffer, manifest=manifest, path=path, filename=filename)
+    
+    
+    def _to_pixels(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Convert data points to screen space, growing the view limits to include them first
+        
+        Limits only grow as more is drawn, so decimating with the current limits never drops a visible vertex
+        """
+        
+        points = np.column_stack([np.ravel(x), np.ravel(y)])
+        
+        self.ax.update_datalim(points)
+        self.ax.autoscale_view()
+        
+        return self.ax.transData.transform(points)
+    
+    def _decimate_tolerance(self) -> float:
+        """
+        decimate_px in the pixels of _to_pixels (the figure's dpi) instead of the saved image's
+        """
+        
+        return self.decimate_px * self.fig.dpi / (self.output_dpi or SAVE_DPI)
+    
+    def decimate_curve(self, x: np.ndarray, y: np.ndarray, z: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+        """
+        Drop the vertices of a curve that are not visible at the output resolution (see decimate_px)
+
+        Args:
+            x (np.ndarray): Points on x-axis\n
+            y (np.ndarray): Points on y-axis\n
+            z (Optional[np.ndarray]): Points on z-axis (3D curves are not decimated)
+
+        Returns:
+            Tuple[np.ndarray, ...]: x, y (and z if given) with the redundant vertices removed
+        """
+        
+        if self.decimate_px is None or self.compute_3D or z is not None:
+            return (x, y) if z is None else (x, y, z)
+        
+        x = np.asarray(x)
+        y = np.asarray(y)
+        mask = rdp_mask(self._to_pixels(x, y), tolerance=self._decimate_tolerance())
         
-        return imgdata.getvalue()
+        return x[mask], y[mask]
     
            
     def plot_orbit(self, orbit_data: Dict[str, List[float]]) -> None:
@@ -196,7 +418,8 @@ class Viewer:
             
             self.ax.plot(orbit_data["x"], orbit_data["y"], orbit_data["z"], label=f"{orbit_data['name']}'s orbit", c=orbit_data["c"])
         else:
-            self.ax.plot(orbit_data["x"], orbit_data["y"], label=f"{orbit_data['name']}'s orbit", c=orbit_data["c"])
+            x, y = self.decimate_curve(orbit_data["x"], orbit_data["y"])
+            self.ax.plot(x, y, label=f"{orbit_data['name']}'s orbit", c=orbit_data["c"])
     
             
     def plot_planet(self, planet_data: Dict[str, float]) -> None:
@@ -219,6 +442,81 @@ class Viewer:
             self.ax.scatter(planet_data["x"], planet_data["y"], label=planet_data["name"], s=25, c=planet_data["c"])
    
              
+    @property
+    def raster_mode(self) -> bool:
+        """
+        True when there are too many chosen planets to draw one artist each (see lod_threshold)
+        """
+        
+        return self.lod_threshold is not None and not self.compute_3D and len(self.chosen_planets) > self.lod_threshold
+    
+    def _raster_extent(self) -> Tuple[float, float, float, float]:
+        # Every orbit fits in a circle of radius max(aphelion)
+        r = 1.05 * max(planet.a * (1 + planet.ecc) for planet in self.chosen_planets)
+        
+        return (-r, r, -r, r)
+    
+    def orbit_raster(self, samples: int = 256, block_size: int = DEFAULT_BLOCK_SIZE) -> DensityRaster:
+        """
+        Bin points along the orbits of the chosen planets (2D)
+
+        Args:
+            samples (int): Points per orbit. Defaults to 256\n
+            block_size (int): Points computed at a time
+
+        Returns:
+            DensityRaster: The binned orbits
+        """
+        
+        raster = DensityRaster(extent=self._raster_extent(), bins=self.raster_bins)
+        
+        with span("viewer.orbit_raster.compute"):
+            elements = orbital_elements(self.chosen_planets, dtype=self.dtype)
+            theta = np.linspace(0, 2*np.pi, samples, endpoint=False)
+            # Shift every orbit's samples by a different fraction of a step, else aligned orbits bin into radial spokes
+            shift = (np.arange(len(self.chosen_planets)) * 0.6180339887 % 1) * 2*np.pi / samples
+            step = max(1, block_size // samples)
+            
+            for start in range(0, len(self.chosen_planets), step):
+                block = {key: value[start:start + step] for key, value in elements.items()}
+                block_theta = (shift[start:start + step, None] + theta).astype(resolve_dtype(self.dtype))
+                raster.add(*place_on_orbits(block, block_theta, compute_3D=False))
+        
+        return raster
+    
+    def position_raster(self) -> DensityRaster:
+        """
+        Bin the positions of the chosen planets at self.t (2D)
+
+        Returns:
+            DensityRaster: The binned positions
+        """
+        
+        raster = DensityRaster(extent=self._raster_extent(), bins=self.raster_bins)
+        
+        with span("viewer.position_raster.compute"):
+            x, y = compute_positions(self.chosen_planets, t=self.t, compute_3D=False, dtype=self.dtype, workers=self.workers)
+            raster.add(x, y)
+        
+        return raster
+    
+    def plot_density(self, raster: DensityRaster, label: Optional[str] = None, cmap: str = "viridis") -> matplotlib.image.AxesImage:
+        """
+        Draw a density raster as a single image (empty bins are transparent)
+
+        Args:
+            raster (DensityRaster): Binned points (see orbit_raster and position_raster)\n
+            label (Optional[str]): Legend label\n
+            cmap (str): Colour map. Defaults to "viridis"
+
+        Returns:
+            matplotlib.image.AxesImage: The image
+        """
+        
+        counts = np.ma.masked_equal(raster.result().T, 0)
+        
+        return self.ax.imshow(counts, origin="lower", extent=raster.extent, cmap=cmap, norm="log", interpolation="nearest", label=label)
+    
     def plot_centre(self, name: str, colour: str) -> None:
         """
         Draw the centre of the model, can be a sun or a planet when using heliocentric model
@@ -238,16 +536,33 @@ class Viewer:
     
     def third_law(self) -> None:
         """
-        Proves Kepler's third law
-        """
+        Proves Kepler's third law: a**3 against P**2 for every planet with the least-squares fit (see Solar_System.third_law_fit)
         
+        Above hexbin_threshold planets the points are drawn as a hexbin density instead of one marker each
+        """
         
-        x = [planet.a**3 for planet in  self.system.planets.values()]
-        y = [planet.P**2 for planet in  self.system.planets.values()]
         
-
-        plt.scatter(x, y, c="#4F81BD", marker="D", label="Kepler's third law")
-        plt.plot(x, y, c="r", label="Linear (Kepler's third law)")
+        with span("viewer.third_law.compute"):
+            fit = self.system.third_law_fit()
+            
+            x = fit["a"]**3
+            y = fit["P"]**2
+            
+            # Fit line, P**2 = 10**(2*intercept) * (a**3)**(2*slope/3)
+            line_x = np.geomspace(x.min(), x.max(), 200)
+            line_y = 10**(2*fit["intercept"]) * line_x**(2*fit["slope"]/3)
+        
+        with span("viewer.third_law.draw"):
+            if self.hexbin_threshold is not None and len(x) > self.hexbin_threshold:
+                plt.hexbin(x, y, xscale="log", yscale="log", bins="log", gridsize=100, cmap="Blues", mincnt=1)
+                plt.colorbar(label="Planets")
+            else:
+                plt.scatter(x, y, c="#4F81BD", marker="D", label="Kepler's third law")
+                
+                if fit["outliers"].any():
+                    plt.scatter(x[fit["outliers"]], y[fit["outliers"]], c="k", marker="x", s=60, label="Outliers")
+            
+            plt.plot(line_x, line_y, c="r", label=f"Linear (Kepler's third law), P ∝ a^{fit['slope']:.3f}")
 
 
         plt.title("Kepler's third law")
@@ -275,12 +590,14 @@ class Viewer:
         t = np.linspace(1, 800, 1000)
 
         # Call angle_vs_time function to get polar angles
-        theta_planet_a = self.system.compute_angle_vs_time(t=t, P=planet_a.P, ecc=planet_a.ecc, theta0=0) 
-        theta_circular = self.system.compute_angle_vs_time(t=t, P=planet_a.P, ecc=0, theta0=0)
+        with span("viewer.angle_vs_time_comparison.compute"):
+            theta_planet_a = self.system.compute_angle_vs_time(t=t, P=planet_a.P, ecc=planet_a.ecc, theta0=0, dtype=self.dtype) 
+            theta_circular = self.system.compute_angle_vs_time(t=t, P=planet_a.P, ecc=0, theta0=0, dtype=self.dtype)
 
         # Plotting
-        self.ax.plot(t, theta_planet_a, label=planet_a_name)
-        self.ax.plot(t, theta_circular, label='Circular Motion')
+        with span("viewer.angle_vs_time_comparison.draw"):
+            self.ax.plot(t, theta_planet_a, label=planet_a_name)
+            self.ax.plot(t, theta_circular, label='Circular Motion')
         
         self.ax.set_xlabel('Time (years)')
         self.ax.set_ylabel('Polar Angle (radians)')
@@ -293,71 +610,332 @@ class Viewer:
         Plot the orbits of the selected planets
         """
         
+        if self.raster_mode:
+            raster = self.orbit_raster()
+            
+            with span("viewer.system_orbits.draw"):
+                self.plot_density(raster, label="Orbits")
+                self.plot_centre(name="Sun", colour="y")
+        else:
+            with span("viewer.system_orbits.draw"):
+                self.plot_centre(name="Sun", colour="y")
+                
+                for planet_orbit_data in self.orbit_data:
+                    self.plot_orbit(orbit_data=planet_orbit_data)  
+        
+        plt.title("Planet orbits")
+        self.lable_axes()
+        
+            
+    def _animation_layers(self) -> Callable[[], List[matplotlib.artist.Artist]]:
+        """
+        Draw what does not change between the frames of animate_orbits (Sun, orbits, title, labels, legend, grid)
+        and create the moving planet markers as animated artists, which normal draws leave out
+        
+        Returns:
+            Callable[[], List[matplotlib.artist.Artist]]: Moves the markers to self.t and returns them
+        """
+        
         self.plot_centre(name="Sun", colour="y")
         
-        for planet_orbit_data in self.orbit_data:
-            self.plot_orbit(orbit_data=planet_orbit_data)  
+        if self.raster_mode:
+            # The orbits do not change between frames, bin them once
+            self.plot_density(self.orbit_raster(), label="Orbits", cmap="Greys")
+            image = self.plot_density(self.position_raster(), label="Planets")
+            image.set_animated(True)
+            
+            def update() -> List[matplotlib.artist.Artist]:
+                with span("viewer.animate_orbits.compute"):
+                    image.set_data(np.ma.masked_equal(self.position_raster().result().T, 0))
+                
+                return [image]
+        
+        else:
+            for planet_orbit_data in self.orbit_data:
+                self.plot_orbit(orbit_data=planet_orbit_data)
+            
+            origin = [[0]] * (3 if self.compute_3D else 2)
+            markers = [self.ax.plot(*origin, "o", ms=5, c=planet.colour, label=planet.name, animated=True)[0] for planet in self.chosen_planets]
+            
+            def update() -> List[matplotlib.artist.Artist]:
+                with span("viewer.animate_orbits.compute"):
+                    positions = compute_positions(self.chosen_planets, t=self.t, compute_3D=self.compute_3D, dtype=self.dtype, workers=self.workers)
+                
+                for marker, coords in zip(markers, positions.transpose(1, 0, 2)):
+                    if self.compute_3D:
+                        marker.set_data_3d(*coords)
+                    else:
+                        marker.set_data(*coords)
+                
+                return markers
         
         plt.title("Planet orbits")
         self.lable_axes()
         
-            
+        plt.legend()
+        plt.grid()
+        
+        return update
+    
     def animate_orbits(self) -> None:
         """
         Animate the orbits of the selected planets
+        
+        The static layer is drawn once and cached; every frame restores it and only draws the planets on top (blitting)
         """
         
+        update = self._animation_layers()
+        canvas = self.fig.canvas
+        background = None
+        
+        def capture_background(event=None) -> None:
+            # Called after every full draw (first show, resize, 3D rotation), so the cache never goes stale
+            nonlocal background
+            background = canvas.copy_from_bbox(self.fig.bbox)
+        
+        callback = canvas.mpl_connect("draw_event", capture_background)
+        
+        # Show the window and draw the static layer
+        plt.pause(1/self.target_fps)
+        
+        if background is None:
+            capture_background()
+        
         while self.t < self.tmax:
-            self.plot_centre(name="Sun", colour="y")
+            artists = update()
+            
+            with span("viewer.animate_orbits.draw"):
+                canvas.restore_region(background)
+                
+                for artist in artists:
+                    self.ax.draw_artist(artist)
+                
+                canvas.blit(self.fig.bbox)
+                canvas.flush_events()
             
-            for planet_orbit_data in self.orbit_data:
-                self.plot_orbit(orbit_data=planet_orbit_data)    
-
-            planet_data = [planet.compute_position(compute_3D=self.compute_3D, t=self.t) for planet in self.chosen_planets]
-            for planet_planet_data in planet_data:
-                self.plot_planet(planet_data=planet_planet_data)
-
             self.t += self.dt
             
-            plt.title("Planet orbits")
-            self.lable_axes()
+            canvas.start_event_loop(1/self.target_fps)
+        
+        canvas.mpl_disconnect(callback)
+    
+    def iter_animation_frames(self, num_frames: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Render the frames of animate_orbits off screen, from self.t to self.tmax (self.t advances by self.dt per frame)
+        
+        The static layer is rasterised once, every frame is a copy of it with the planets drawn on top
+        
+        Args:
+            num_frames (Optional[int]): Stop after this many frames (leave blank to stop at self.tmax)
+        
+        Yields:
+            np.ndarray: RGBA frame, shape (height, width, 4)
+        """
+        
+        update = self._animation_layers()
+        canvas = self.fig.canvas
+        
+        with span("viewer.animate_orbits.background"):
+            canvas.draw()
+            background = canvas.copy_from_bbox(self.fig.bbox)
+        
+        frame = 0
+        while self.t < self.tmax and (num_frames is None or frame < num_frames):
+            artists = update()
             
-            plt.legend()
-            plt.grid()
+            with span("viewer.animate_orbits.draw"):
+                canvas.restore_region(background)
+                
+                for artist in artists:
+                    self.ax.draw_artist(artist)
+                
+                image = np.asarray(canvas.buffer_rgba()).copy()
             
-            plt.pause(1/self.target_fps)
-            plt.cla()
+            yield image
+            
+            self.t += self.dt
+            frame += 1
+    
+    def export_animation(self, path: str, filename: str, num_frames: Optional[int] = None, fps: Optional[int] = None) -> None:
+        """
+        Save the orbits animation as a GIF (see iter_animation_frames)
+
+        Args:
+            path (str): directory where the animation will be stored\n
+            filename (str): name of the file (.gif)\n
+            num_frames (Optional[int]): Stop after this many frames (leave blank to stop at self.tmax)\n
+            fps (Optional[int]): Frames per second. Defaults to self.target_fps
+        """
+        
+        # Pillow comes with matplotlib, but is only needed here
+        from PIL import Image
+        
+        if not os.path.exists(path):
+            os.mkdir(path)
+        
+        # Frames are rendered as Pillow asks for them, it only keeps its palette copy of each (1 byte per pixel instead of 4)
+        frames = (Image.fromarray(frame).convert("RGB") for frame in self.iter_animation_frames(num_frames=num_frames))
+        first = next(frames, None)
+        if first is None:
+            return
+        
+        with span("viewer.export_animation.encode"):
+            first.save(f"{path}/{filename}", save_all=True, append_images=frames, duration=1000 / (fps or self.target_fps), loop=0)
+    
+    
+    def stream_frames(self, t_start: Optional[float] = None, t_end: Optional[float] = None, chunk_size: int = 256) -> Iterator[FrameChunk]:
+        """
+        Stream the frames of animate_orbits (positions of the chosen planets) without drawing them
+        
+        Args:
+            t_start (Optional[float]): Time of the first frame. Defaults to self.t\n
+            t_end (Optional[float]): End time. Defaults to self.tmax\n
+            chunk_size (int): Frames per chunk. Defaults to 256
+
+        Returns:
+            Iterator[FrameChunk]: Chunks of frames, computed as they are consumed (see stream.iter_frames)
+        """
+        
+        return iter_frames(planets=self.chosen_planets,
+                           t_start=self.t if t_start is None else t_start,
+                           t_end=self.tmax if t_end is None else t_end,
+                           dt=self.dt,
+                           chunk_size=chunk_size,
+                           compute_3D=self.compute_3D,
+                           dtype=self.dtype)
+    
+    def astream_frames(self, t_start: Optional[float] = None, t_end: Optional[float] = None, chunk_size: int = 256) -> AsyncIterator[FrameChunk]:
+        """
+        Async version of stream_frames (use with `async for`)
+        
+        Args:
+            t_start (Optional[float]): Time of the first frame. Defaults to self.t\n
+            t_end (Optional[float]): End time. Defaults to self.tmax\n
+            chunk_size (int): Frames per chunk. Defaults to 256
+
+        Returns:
+            AsyncIterator[FrameChunk]: Chunks of frames, computed as they are consumed (see stream.aiter_frames)
+        """
+        
+        return aiter_frames(planets=self.chosen_planets,
+                            t_start=self.t if t_start is None else t_start,
+                            t_end=self.tmax if t_end is None else t_end,
+                            dt=self.dt,
+                            chunk_size=chunk_size,
+                            compute_3D=self.compute_3D,
+                            dtype=self.dtype)
+    
+    
+    def compute_spinograph(self, t: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Compute the lines of a spinograph (the position of every chosen planet at each time)
+
+        Args:
+            t (np.ndarray): Times at which a line is drawn
+
+        Returns:
+            Dict: {x: array (len(t), number of chosen planets) of points on x-axis,
+                    y: array (len(t), number of chosen planets) of points on y-axis,
+                    z: array (len(t), number of chosen planets) of points on z-axis}
+                    
+            (z only included if self.compute_3D)
+        """
+        
+        planets_data = [planet.compute_position(compute_3D=self.compute_3D, t=t, dtype=self.dtype) for planet in self.chosen_planets]
+        
+        axes = ["x", "y", "z"] if self.compute_3D else ["x", "y"]
+        
+        return {axis: np.stack([planet_data[axis] for planet_data in planets_data], axis=1) for axis in axes}
     
     
-    def spinograph(self, lines_drawn: int = 1234) -> None:
+    def _spinograph_grid(self, t_end: float, span_length: float, lines_drawn: int) -> Tuple[float, int]:
+        """
+        Time step and number of lines of a spinograph from self.t to t_end (shared by spinograph and get_geometry_data)
+        """
+        
+        # No lines at all still draws the orbits
+        dt = span_length / max(lines_drawn, 1)
+        
+        return dt, frame_count(t_start=self.t, t_end=t_end, dt=dt) if lines_drawn > 0 else 0
+    
+    
+    def spinograph(self, lines_drawn: int = 1234, block_size: int = DEFAULT_BLOCK_SIZE, auto_close: bool = False, density: float = 50, closure_tolerance: float = 0.01, max_lines: int = 20000) -> None:
         """
         Draw a spinograph with the chosen planets 
         
         Args:
             lines_drawn (Optional[int]): Sets how many lines drawn will be drawn . Defaults to 1234
+            block_size (int): Lines computed at a time (bounds memory for large lines_drawn, see ephemeris.evaluate_chunked)
+            auto_close (bool): Ignore lines_drawn and draw just until the pattern closes (see Solar_System.repeat_period). Defaults to False
+            density (float): With auto_close, lines per synodic period of the fastest and slowest chosen planets (one loop of the pattern). Defaults to 50
+            closure_tolerance (float): With auto_close, how far from closed (in orbits) the pattern may be. Defaults to 0.01
+            max_lines (int): Most lines to draw, fewer are spread over the same time span (with a RuntimeWarning) if more are asked for. Defaults to 20000
         """
         
-        self.tmax *= 10
-        self.dt = self.tmax / lines_drawn
+        if auto_close:
+            planet_names = [planet.name for planet in self.chosen_planets]
+            span_length = self.system.repeat_period(planet_names=planet_names, tolerance=closure_tolerance)
+            
+            # The pattern makes one loop per synodic period of its fastest and slowest planets
+            fastest = min(self.chosen_planets, key=lambda planet: planet.P)
+            slowest = max(self.chosen_planets, key=lambda planet: planet.P)
+            loop_length = self.system.synodic_period(fastest.name, slowest.name)
+            if not np.isfinite(loop_length):
+                loop_length = fastest.P
+            
+            lines_drawn = int(np.ceil(density * span_length / loop_length))
+            
+            self.tmax = self.t + span_length
         
+        else:
+            self.tmax *= 10
+            span_length = self.tmax
         
-        while self.t < self.tmax:
-            planet_data = [planet.compute_position(compute_3D=self.compute_3D, t=self.t) for planet in self.chosen_planets]
+        if lines_drawn > max_lines:
+            warnings.warn(f"Drawing {max_lines} lines instead of {lines_drawn} (max_lines)", RuntimeWarning, stacklevel=2)
+            lines_drawn = max_lines
+        
+        self.dt, num_points = self._spinograph_grid(t_end=self.tmax, span_length=span_length, lines_drawn=lines_drawn)
+        
+        axes = ["x", "y", "z"] if self.compute_3D else ["x", "y"]
+        lines = {axis: [] for axis in axes}
+        
+        def collect_lines(t: np.ndarray, positions: np.ndarray) -> None:
+            # One row per line, one column per planet
+            block = dict(zip(axes, positions.transpose(0, 2, 1)))
+            
+            if self.decimate_px is not None and not self.compute_3D:
+                # Lines are too short to simplify, drop the ones drawn on top of the previous one instead
+                pixels = self._to_pixels(block["x"], block["y"]).reshape(*block["x"].shape, 2)
+                mask = cull_lines_mask(pixels, tolerance=self._decimate_tolerance())
+                block = {axis: coords[mask] for axis, coords in block.items()}
+            
+            for axis in axes:
+                lines[axis].append(block[axis])
+        
+        with span("viewer.spinograph.compute"):
+            evaluate_chunked(planets=self.chosen_planets, t_start=self.t, dt=self.dt, num_points=num_points, consumer=collect_lines, compute_3D=self.compute_3D, block_size=block_size, dtype=self.dtype, workers=self.workers)
             
-            x = [data["x"] for data in planet_data]
-            y = [data["y"] for data in planet_data]
+            self.t += self.dt * num_points
+            empty = np.empty((0, len(self.chosen_planets)), dtype=resolve_dtype(self.dtype))
+            lines = {axis: np.concatenate(coords) if coords else empty for axis, coords in lines.items()}
+        
+        with span("viewer.spinograph.draw"):
+            # One artist for every line: (lines, planets, 2 or 3) vertices
+            segments = np.stack([lines[axis] for axis in axes], axis=-1)
             
             if self.compute_3D:
-                z = [data["z"] for data in planet_data]
-                self.ax.plot(x, y, z, c="k")
+                from mpl_toolkits.mplot3d.art3d import Line3DCollection
+                # Empty collections break the 3D axes' limits
+                if len(segments):
+                    self.ax.add_collection3d(Line3DCollection(segments, colors="k"))
             else:
-                self.ax.plot(x, y, c="k")
-            
+                from matplotlib.collections import LineCollection
+                self.ax.add_collection(LineCollection(segments, colors="k"))
+                self.ax.autoscale_view()
             
-            self.t += self.dt
-        
-        for planet_orbit_data in self.orbit_data:
-            self.plot_orbit(orbit_data=planet_orbit_data)
+            for planet_orbit_data in self.orbit_data:
+                self.plot_orbit(orbit_data=planet_orbit_data)
         
         
         plt.title(f"{self.system.system_name}'s spinograph")
@@ -374,21 +952,23 @@ class Viewer:
         
         
         while self.t < self.tmax:
-            planet_data = [planet.compute_position(compute_3D=self.compute_3D, t=self.t) for planet in self.chosen_planets]
-            
-            x = [data["x"] for data in planet_data]
-            y = [data["y"] for data in planet_data]
+            with span("viewer.animate_spinograph.compute"):
+                planet_data = [planet.compute_position(compute_3D=self.compute_3D, t=self.t, dtype=self.dtype) for planet in self.chosen_planets]
             
-            if self.compute_3D:
-                z = [data["z"] for data in planet_data]
-                self.ax.plot(x, y, z, c="k")
-            else:
-                self.ax.plot(x, y, c="k")
+            with span("viewer.animate_spinograph.draw"):
+                x = [data["x"] for data in planet_data]
+                y = [data["y"] for data in planet_data]
+                
+                if self.compute_3D:
+                    z = [data["z"] for data in planet_data]
+                    self.ax.plot(x, y, z, c="k")
+                else:
+                    self.ax.plot(x, y, c="k")
+                
+                self.t += self.dt
             
-            self.t += self.dt
-        
-            for planet_orbit_data in self.orbit_data:
-                self.plot_orbit(orbit_data=planet_orbit_data)
+                for planet_orbit_data in self.orbit_data:
+                    self.plot_orbit(orbit_data=planet_orbit_data)
         
             
             plt.pause(1/self.target_fps)
@@ -397,62 +977,65 @@ class Viewer:
         self.lable_axes()
         
               
-    def heliocentric_model(self, origin_planet_name: str) -> None:
+    def compute_heliocentric(self, origin_planet_name: str, t: np.ndarray) -> List[Dict[str, np.ndarray]]:
+        """
+        Compute the paths of the chosen planets as seen from origin_planet_name
+
+        Args:
+            origin_planet_name (str): Name of centre planet (from planets in self.system.planets)\n
+            t (np.ndarray): Times to compute the paths at
+
+        Returns:
+            List[Dict]: One dict per chosen planet {name: planet name, 
+                    c: colour,
+                    x: array of points on x-axis, 
+                    y: array of points on y-axis,
+                    z: array of points on z-axis}
+                    
+            (z only included if self.compute_3D)
+        """
+        
+        origin_planet_data = self.system.planets[origin_planet_name].compute_position(compute_3D=self.compute_3D, t=t, dtype=self.dtype)
+        
+        planets_data = [planet.compute_position(compute_3D=self.compute_3D, t=t, dtype=self.dtype) for planet in self.chosen_planets]
+        
+        return [self.system.compute_relative_vector(origin_planet_data=origin_planet_data, target_planet_data=target_planet_data) for target_planet_data in planets_data]
+    
+    
+    def heliocentric_model(self, origin_planet_name: str, num_points: int = 3000, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
         """
         Compute the heliocentric using origin_planet_name as centre
 
         Args:
             origin_planet_name (str): Name of centre planet (from planets in self.system.planets).
+            num_points (int): Points per planet. Defaults to 3000
+            block_size (int): Points computed at a time, with decimate_px set memory stays bounded for any num_points (see ephemeris.evaluate_chunked)
         """
         
-        num_points = 3000
-        
         self.tmax *= 20
         self.dt = self.tmax / num_points
         
-        
-        
-        x = np.zeros((len(self.chosen_planets), num_points))
-        y = np.zeros((len(self.chosen_planets), num_points))
-
-        if self.compute_3D:
-            z = np.zeros((len(self.chosen_planets), num_points))
-        
-        for i in range(num_points):
-            origin_planet_data = self.system.planets[origin_planet_name].compute_position(compute_3D=self.compute_3D, t=self.t)
-            
-            planets_data = [planet.compute_position(compute_3D=self.compute_3D, t=self.t) for planet in self.chosen_planets]
-            
-            relative_planets_data = [self.system.compute_relative_vector(origin_planet_data=origin_planet_data, target_planet_data=target_planet_data) for target_planet_data in planets_data]
+        with span("viewer.heliocentric_model.compute"):
+            curves = evaluate_chunked(planets=self.chosen_planets,
+                                      t_start=self.t,
+                                      dt=self.dt,
+                                      num_points=num_points,
+                                      consumer=CurveCollector(simplify=self.decimate_curve if self.decimate_px is not None else None),
+                                      compute_3D=self.compute_3D,
+                                      origin=self.system.planets[origin_planet_name],
+                                      block_size=block_size,
+                                      dtype=self.dtype,
+                                      workers=self.workers)
             
-            # Improvement: compute all positions and then plot
-            for j, planet_data in enumerate(relative_planets_data):
-                x[j][i] = planet_data["x"]
-                y[j][i] = planet_data["y"]
-                
-                if self.compute_3D:
-                    z[j][i] = planet_data["z"]
-                    
-            self.t += self.dt
+            self.t += self.dt * num_points
         
 
-        
-        if self.compute_3D:
-            for planet_x, planet_y, planet_z, planet in zip(x, y, z, self.chosen_planets):
-                self.ax.plot(planet_x, planet_y, planet_z, label=planet.name, c=planet.colour)
-                
-            
-                
-        else:
-            for planet_x, planet_y, planet in zip(x, y, self.chosen_planets):
-                self.ax.plot(planet_x, planet_y, label=planet.name, c=planet.colour)
-            
+        with span("viewer.heliocentric_model.draw"):
+            for coords, planet in zip(curves, self.chosen_planets):
+                self.ax.plot(*coords, label=planet.name, c=planet.colour)
 
-        self.plot_centre(name=origin_planet_name, colour=origin_planet_data["c"])
+            self.plot_centre(name=origin_planet_name, colour=self.system.planets[origin_planet_name].colour)
 
         
         plt.title(f"{origin_planet_name}'s heliocentric model")
         self.lable_axes()
-        
-                    
-    
\ No newline at end of file
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from solarkit import Solar_System
+
+
+@pytest.mark.parametrize("ecc", [0.01, 0.3, 0.9])
+def test_float32_matches_float64(ecc):
+    system = Solar_System()
+    t = np.linspace(1, 800, 1000)
+    
+    single = system.compute_angle_vs_time(t=t, P=1, ecc=ecc, theta0=0, dtype=np.float32)
+    double = system.compute_angle_vs_time(t=t, P=1, ecc=ecc, theta0=0, dtype=np.float64)
+    
+    assert single.dtype == np.float32
+    np.testing.assert_allclose(single, double, rtol=1e-7)
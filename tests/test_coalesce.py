@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from solarkit.coalesce import SingleFlight, normalize_key
+
+
+def test_key_ignores_field_order():
+    assert normalize_key({"a": 1, "b": {"c": 2, "d": 3}}) == normalize_key({"b": {"d": 3, "c": 2}, "a": 1})
+    assert normalize_key({"a": 1}) != normalize_key({"a": 2})
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    
+    def work():
+        calls.append(threading.get_ident())
+        release.wait(5)
+        return object()
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [pool.submit(flight.do, "key", work) for _ in range(8)]
+        # Let every thread join the call in flight
+        time.sleep(0.2)
+        release.set()
+        results = [result.result() for result in results]
+    
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert len(flight) == 0
+    
+    # Finished calls are forgotten
+    assert flight.do("key", lambda: 1) == 1
+
+
+def test_exception_raised_in_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+    
+    def work():
+        release.wait(5)
+        raise ValueError("failed")
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = [pool.submit(flight.do, "key", work) for _ in range(4)]
+        time.sleep(0.2)
+        release.set()
+        
+        for result in results:
+            with pytest.raises(ValueError, match="failed"):
+                result.result()
+    
+    assert len(flight) == 0
+
+
+def test_futures_shared_while_in_flight():
+    flight = SingleFlight()
+    submitted = []
+    
+    def submit():
+        submitted.append(Future())
+        return submitted[-1]
+    
+    first = flight.do_future("key", submit)
+    assert flight.do_future("key", submit) is first
+    assert flight.do_future("other", submit) is not first
+    
+    first.set_result(1)
+    assert flight.do_future("key", submit) is not first
+    assert len(submitted) == 3
+
+
+def test_async_tasks_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+    
+    async def main():
+        return await asyncio.gather(*[flight.do_async("key", work) for _ in range(10)])
+    
+    assert asyncio.run(main()) == [1] * 10
+    assert len(flight) == 0
+
+
+def test_async_and_thread_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "image"
+    
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "key", work)
+        while not len(flight):
+            time.sleep(0.01)
+        
+        async def follower():
+            async def never_called():
+                raise AssertionError("the call in flight should be joined")
+            
+            task = asyncio.ensure_future(flight.do_async("key", never_called))
+            await asyncio.sleep(0.05)
+            release.set()
+            return await task
+        
+        assert asyncio.run(follower()) == "image"
+        assert leader.result() == "image"
+    
+    assert len(calls) == 1
@@ -0,0 +1,30 @@
+import numpy as np
+
+from solarkit.decimate import rdp_mask
+
+
+def test_fold_back_kept():
+    # The middle point is on the chord's line but past the end of the segment
+    assert rdp_mask(np.array([[0, 0], [100, 0], [50, 0]]), tolerance=1).tolist() == [True, True, True]
+
+
+def test_straight_line_dropped():
+    points = np.column_stack([np.linspace(0, 100, 11), np.zeros(11)])
+    
+    assert rdp_mask(points, tolerance=1).tolist() == [True] + [False] * 9 + [True]
+
+
+def test_within_tolerance_of_original():
+    theta = np.linspace(0, 2*np.pi, 2000)
+    points = np.column_stack([300*np.cos(theta), 200*np.sin(theta)])
+    
+    keep = rdp_mask(points, tolerance=0.5)
+    kept = points[keep]
+    
+    assert keep[0] and keep[-1] and keep.sum() < len(points) // 4
+    # Every dropped point is within the tolerance of the segment that replaced it
+    segment = np.searchsorted(np.flatnonzero(keep), np.arange(len(points)), side="right") - 1
+    segment = np.minimum(segment, len(kept) - 2)
+    start, chord = kept[segment], kept[segment + 1] - kept[segment]
+    along = np.clip(np.sum((points - start) * chord, axis=1) / np.sum(chord**2, axis=1), 0, 1)
+    assert np.hypot(*(points - start - along[:, None] * chord).T).max() <= 0.5
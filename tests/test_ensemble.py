@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from solarkit import load_system_from_csv
+from solarkit.ensemble import Ensemble
+
+
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+
+
+@pytest.mark.parametrize("relative", [True, False])
+@pytest.mark.parametrize("element", ["beta", "lan", "argp"])
+def test_angles_are_perturbed_in_degrees(relative, element):
+    system = load_system_from_csv(str(CSV))
+    
+    ensemble = Ensemble.perturb(system, variants=2000, sigma={element: 5}, relative=relative, planet_names=["Earth"], seed=1)
+    
+    # Earth's inclination is 0 and its orientation unset, relative noise would leave them unchanged
+    assert np.degrees(ensemble.elements[element].std()) == pytest.approx(5, rel=0.1)
+
+
+def test_unset_orientation_perturbed_around_original():
+    system = load_system_from_csv(str(CSV))
+    original = Ensemble.perturb(system, variants=1, sigma={}, planet_names=["Mars"])
+    
+    ensemble = Ensemble.perturb(system, variants=4, sigma={"lan": 1e-9}, planet_names=["Mars"], seed=1)
+    
+    orbits = ensemble.compute_orbits(compute_3D=True, dtype=np.float64)
+    expected = original.compute_orbits(compute_3D=True, dtype=np.float64)
+    
+    for k in range(len(ensemble)):
+        np.testing.assert_allclose(orbits[:, k], expected[:, 0], atol=1e-8)
+
+
+def test_variant_round_trip():
+    system = load_system_from_csv(str(CSV))
+    ensemble = Ensemble.from_systems([system])
+    
+    variant = ensemble.variant(0)
+    
+    assert variant.planets["Mars"].lan is None and variant.planets["Mars"].argp is None
+    assert variant.planets["Mars"].a == system.planets["Mars"].a
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from solarkit import kernels, load_system_from_csv
+from solarkit.ephemeris import orbital_elements, positions_from_elements, positions_threaded
+
+
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+
+
+@pytest.mark.parametrize("compute_3D", [False, True])
+@pytest.mark.parametrize("backend", kernels.available_backends())
+def test_threaded_matches_serial(backend, compute_3D):
+    elements = orbital_elements(list(load_system_from_csv(str(CSV)).planets.values()), dtype=np.float64)
+    t = np.linspace(0, 100, 50000)
+    
+    previous = kernels.get_backend()
+    kernels.set_backend(backend)
+    try:
+        threaded = positions_threaded(elements=elements, t=t, compute_3D=compute_3D, dtype=np.float64, workers=4)
+        serial = positions_from_elements(elements=elements, t=t, compute_3D=compute_3D, dtype=np.float64)
+    finally:
+        kernels.set_backend(previous)
+    
+    np.testing.assert_array_equal(threaded, serial)
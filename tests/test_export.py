@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import pytest
+
+matplotlib.use("Agg")
+
+from solarkit import load_system_from_csv  # noqa: E402
+from solarkit.viewer import Viewer  # noqa: E402
+
+
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+PLANETS = ["Mercury", "Venus", "Earth"]
+
+
+def read_layer(path, filename, layer):
+    with open(path / f"{filename}.json") as f:
+        manifest = json.load(f)
+    
+    buffer = np.frombuffer((path / f"{filename}.bin").read_bytes(), dtype="<f4")
+    assert buffer.nbytes == manifest["byte_length"]
+    
+    items = []
+    for entry in manifest["layers"][layer]:
+        start = entry["offset"] // 4
+        items.append(buffer[start:start + entry["count"] * manifest["dims"]].reshape(entry["count"], manifest["dims"]))
+    
+    return manifest, items
+
+
+def test_orbits_round_trip(tmp_path):
+    viewer = Viewer(system=load_system_from_csv(str(CSV)), planets_to_use=PLANETS, dtype=np.float64)
+    
+    viewer.export_geometry(path=str(tmp_path), filename="geometry", lines_drawn=None)
+    manifest, orbits = read_layer(tmp_path, "geometry", "orbits")
+    
+    assert [entry["name"] for entry in manifest["layers"]["orbits"]] == PLANETS
+    for orbit, orbit_data in zip(orbits, viewer.orbit_data):
+        np.testing.assert_allclose(orbit, np.column_stack([orbit_data["x"], orbit_data["y"]]), rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize("t", [0, 0.37])
+def test_spinograph_layer_matches_spinograph(tmp_path, t):
+    system = load_system_from_csv(str(CSV))
+    
+    exported = Viewer(system=system, planets_to_use=PLANETS, dtype=np.float64)
+    exported.t = t
+    exported.export_geometry(path=str(tmp_path), filename="geometry", lines_drawn=200)
+    manifest, (lines,) = read_layer(tmp_path, "geometry", "spinograph")
+    
+    drawn = Viewer(system=system, planets_to_use=PLANETS, dtype=np.float64)
+    drawn.t = t
+    drawn.initialise_plotter(dpi=50)
+    drawn.spinograph(lines_drawn=200)
+    segments = np.concatenate(drawn.ax.collections[0].get_segments())
+    drawn.close_graph()
+    
+    assert manifest["layers"]["spinograph"][0]["stride"] == len(PLANETS)
+    np.testing.assert_allclose(lines, segments, rtol=1e-6, atol=1e-6)
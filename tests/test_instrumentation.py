@@ -0,0 +1,12 @@
+from solarkit.instrumentation import CollectorSink
+
+
+def test_to_prometheus_escapes_label_values():
+    sink = CollectorSink()
+    sink.record('load "a\\b"\nc', 0.5)
+    
+    lines = sink.to_prometheus().splitlines()
+    
+    assert lines == ["# TYPE solarkit_span_seconds summary",
+                     'solarkit_span_seconds_count{span="load \\"a\\\\b\\"\\nc"} 1',
+                     'solarkit_span_seconds_sum{span="load \\"a\\\\b\\"\\nc"} 0.500000000']
@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from solarkit import Planet, load_system_from_csv
+from solarkit.ephemeris import compute_positions, orbital_elements, place_on_orbits
+from solarkit.planet import LEGACY_ARGP, LEGACY_LAN, orientation_matrices
+
+
+# J2000 mean elements, argp = longitude of perihelion - lan
+EARTH = Planet(name="Earth", m=1, a=1.00000261, ecc=0.01671123, beta=0, R=1, trot=1, P=1, lan=0, argp=102.93768193)
+MARS = Planet(name="Mars", m=0.107, a=1.52371034, ecc=0.0933941, beta=1.84969142, R=0.532, trot=1.03, P=1.8808, lan=49.55953891, argp=-23.94362959 - 49.55953891)
+
+
+def ecliptic(planet, nu):
+    # Points at true anomalies nu, the model measures its polar angle from aphelion
+    elements = orbital_elements([planet], dtype=np.float64)
+    x, y, z = place_on_orbits(elements, np.asarray(nu, dtype=float) + np.pi, compute_3D=True)[:, 0]
+    
+    return np.degrees(np.arctan2(y, x)) % 360, np.degrees(np.arctan2(z, np.hypot(x, y))), np.sqrt(x**2 + y**2 + z**2)
+
+
+def test_earth_perihelion():
+    longitude, latitude, r = ecliptic(EARTH, [0])
+    
+    assert longitude[0] == pytest.approx(102.93768193)
+    assert latitude[0] == pytest.approx(0, abs=1e-12)
+    assert r[0] == pytest.approx(EARTH.a * (1 - EARTH.ecc))
+
+
+def test_mars_nodes_and_perihelion():
+    argp = np.radians(MARS.argp)
+    longitude, latitude, r = ecliptic(MARS, [-argp, np.pi - argp, np.pi / 2 - argp, 0])
+    
+    # Ascending and descending nodes on the ecliptic at lan and lan + 180
+    assert latitude[:2] == pytest.approx([0, 0], abs=1e-9)
+    assert longitude[:2] == pytest.approx([MARS.lan, MARS.lan + 180])
+    
+    # Furthest north 90 degrees past the ascending node
+    assert latitude[2] == pytest.approx(MARS.beta)
+    
+    # Perihelion (longitude of perihelion 336.06 deg, about 1.78 deg south)
+    assert r[3] == pytest.approx(MARS.a * (1 - MARS.ecc))
+    assert longitude[3] == pytest.approx(336.06, abs=0.05)
+    assert latitude[3] == pytest.approx(-1.78, abs=0.01)
+
+
+def test_2D_matches_3D_without_inclination():
+    planet = Planet(name="b", m=1, a=2, ecc=0.3, beta=0, R=1, trot=1, P=3, lan=40, argp=70)
+    
+    orbit_2D = planet.compute_orbit(compute_3D=False, dtype=np.float64)
+    orbit_3D = planet.compute_orbit(compute_3D=True, dtype=np.float64)
+    
+    np.testing.assert_allclose(orbit_2D["x"], orbit_3D["x"], atol=1e-12)
+    np.testing.assert_allclose(orbit_2D["y"], orbit_3D["y"], atol=1e-12)
+    
+    # Perihelion 110 degrees from the x-axis
+    perihelion = np.argmin(np.hypot(orbit_2D["x"], orbit_2D["y"]))
+    assert np.degrees(np.arctan2(orbit_2D["y"][perihelion], orbit_2D["x"][perihelion])) == pytest.approx(110, abs=0.5)
+
+
+# Mars from planet_data.csv (no lan/argp) with the transform used before orientations were added
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+LEGACY_MARS_ORBIT = {False: {"x": [1.6600699999999997, -0.002374983241227062], "y": [0.0, 1.5104480843332544]},
+                     True: {"x": [1.6592047196006718, -0.0023737453256889424], "y": [0.0, 1.5104480843332544], "z": [0.05359200831145743, -7.667153891306562e-05]}}
+LEGACY_MARS_POSITION = {False: [-0.9871657347143653, 1.0232655893694667],
+                        True: [-0.9866511930618226, 1.0232655893694667, -0.031868652683078584]}
+
+
+@pytest.mark.parametrize("compute_3D", [False, True])
+def test_unset_orientation_matches_legacy(compute_3D):
+    mars = load_system_from_csv(str(CSV)).planets["Mars"]
+    assert mars.lan is None and mars.argp is None
+    
+    orbit = mars.compute_orbit(compute_3D=compute_3D, dtype=np.float64)
+    position = mars.compute_position(compute_3D=compute_3D, t=0.7, dtype=np.float64)
+    
+    for axis, expected in LEGACY_MARS_ORBIT[compute_3D].items():
+        np.testing.assert_allclose(orbit[axis][[0, 250]], expected, rtol=1e-12, atol=1e-15)
+    
+    np.testing.assert_allclose([np.ravel(position[axis])[0] for axis in "xyz"[:2 + compute_3D]], LEGACY_MARS_POSITION[compute_3D], rtol=1e-12)
+    
+    # The vectorised path agrees
+    positions = compute_positions([mars], np.array([0.7]), compute_3D=compute_3D, dtype=np.float64)
+    np.testing.assert_allclose(positions[:, 0, 0], LEGACY_MARS_POSITION[compute_3D], rtol=1e-12)
+
+
+def test_legacy_equivalent_elements():
+    beta = np.radians([0, 1.85, 30])
+    unset = np.full(3, np.nan)
+    
+    for compute_3D in (False, True):
+        np.testing.assert_allclose(orientation_matrices(beta, unset, unset, compute_3D=compute_3D),
+                                   orientation_matrices(beta, np.radians(LEGACY_LAN), np.radians(LEGACY_ARGP), compute_3D=compute_3D), atol=1e-15)
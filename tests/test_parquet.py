@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+from solarkit import load_system_from_csv  # noqa: E402
+from solarkit.utils import iter_planets_from_dataset, load_system_from_parquet  # noqa: E402
+
+
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+
+
+@pytest.fixture(params=["parquet", "feather"])
+def dataset(request, tmp_path):
+    frame = pd.read_csv(CSV)
+    path = tmp_path / f"planets.{request.param}"
+    
+    if request.param == "parquet":
+        frame.to_parquet(path)
+    else:
+        frame.to_feather(path)
+    
+    return str(path), request.param
+
+
+def test_round_trip(dataset):
+    path, file_format = dataset
+    
+    assert load_system_from_parquet(path, file_format=file_format).planets == load_system_from_csv(str(CSV)).planets
+
+
+def test_row_filter(dataset):
+    path, file_format = dataset
+    expected = {name: planet for name, planet in load_system_from_csv(str(CSV)).planets.items() if planet.P < 2}
+    
+    system = load_system_from_parquet(path, file_format=file_format, row_filter=ds.field("P") < 2)
+    
+    # The Sun (a = 0) is always filtered out
+    assert system.planets == expected
+    assert "Sun" not in system.planets
+
+
+def test_orientation_columns(tmp_path):
+    frame = pd.read_csv(CSV)
+    frame["lan"] = [None] * (len(frame) - 1) + [110.3]
+    frame["argp"] = [None] * (len(frame) - 1) + [113.8]
+    frame.to_parquet(tmp_path / "planets.parquet")
+    
+    planets = [planet for batch in iter_planets_from_dataset(str(tmp_path / "planets.parquet"), batch_size=3) for planet in batch]
+    
+    assert (planets[-1].lan, planets[-1].argp) == (110.3, 113.8)
+    assert all(planet.lan is None and planet.argp is None for planet in planets[:-1])
@@ -0,0 +1,91 @@
+import json
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from solarkit.service import RenderService, ServiceBusy, validate_request
+
+
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+
+REQUEST = {"system": "solar", "method": "system_orbits", "planets": ["Earth", "Mars"]}
+
+
+def post(service, request):
+    body = json.dumps(request).encode()
+    answer = {}
+    
+    def start_response(status, headers):
+        answer["status"] = int(status.split()[0])
+        answer["headers"] = dict(headers)
+    
+    content = b"".join(service.wsgi_app({"PATH_INFO": "/render", "REQUEST_METHOD": "POST", "CONTENT_LENGTH": str(len(body)), "wsgi.input": BytesIO(body)}, start_response))
+    
+    return answer["status"], answer["headers"]["Content-Type"], content
+
+
+@pytest.mark.parametrize("field, value", [("dpi", True), ("dpi", 1), ("dpi", 5000), ("dpi", "100"),
+                                          ("compute_3D", "false"), ("compute_3D", 1),
+                                          ("format", "gif"), ("method", "animate"), ("system", "other")])
+def test_invalid_requests_rejected(field, value):
+    with pytest.raises(ValueError):
+        validate_request({**REQUEST, field: value}, ["solar"])
+
+
+def test_invalid_params_rejected():
+    with pytest.raises(ValueError):
+        validate_request({**REQUEST, "method": "spinograph", "params": {"lines_drawn": True}}, ["solar"])
+    with pytest.raises(ValueError):
+        validate_request({**REQUEST, "method": "heliocentric_model"}, ["solar"])
+
+
+def test_valid_request_defaults():
+    request = validate_request({**REQUEST, "dpi": 10, "compute_3D": True}, ["solar"])
+    
+    assert request["compute_3D"] is True
+    assert request["dpi"] == 10
+    assert request["format"] == "png"
+
+
+def test_wsgi_errors_are_json(monkeypatch):
+    with RenderService({"solar": str(CSV)}, workers=1) as service:
+        status, content_type, content = post(service, {**REQUEST, "dpi": True})
+        assert status == 400 and content_type == "application/json"
+        assert "dpi" in json.loads(content)["error"]
+        
+        def broken_render(request):
+            raise RuntimeError("matplotlib gave up")
+        
+        monkeypatch.setattr(service, "render", broken_render)
+        status, content_type, content = post(service, REQUEST)
+        assert status == 500 and content_type == "application/json"
+        assert "matplotlib gave up" in json.loads(content)["error"]
+
+
+def test_busy_and_timeout():
+    # The first request also starts the worker, so it is still in flight when the others arrive
+    with RenderService({"solar": str(CSV)}, workers=1, max_queue=0, timeout=60, coalesce=False) as service:
+        first = service.submit(REQUEST)
+        
+        with pytest.raises(ServiceBusy):
+            service.submit(REQUEST)
+        assert post(service, REQUEST)[0] == 503
+        
+        image, content_type = first.result(timeout=60)
+        assert content_type == "image/png" and image.startswith(b"\x89PNG")
+    
+    with RenderService({"solar": str(CSV)}, workers=1, timeout=0.01) as service:
+        status, content_type, content = post(service, REQUEST)
+        assert status == 504
+        assert "longer than" in json.loads(content)["error"]
+
+
+def test_identical_requests_coalesced():
+    with RenderService({"solar": str(CSV)}, workers=1, max_queue=0) as service:
+        first = service.submit(REQUEST)
+        # Same request with its fields in another order: joins the render in flight without a queue slot
+        second = service.submit(dict(reversed(list(REQUEST.items()))))
+        
+        assert second is first
+        assert first.result(timeout=60)[0].startswith(b"\x89PNG")
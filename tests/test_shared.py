@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from solarkit import load_system_from_csv
+from solarkit.shared import attach, publish
+
+
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+
+
+def test_attach_matches_published():
+    system = load_system_from_csv(str(CSV))
+    
+    with publish(system, compute_3D=False, dtype=np.float64) as published:
+        shared = attach(published.name)
+        
+        orbit = shared.orbit_data(["Mars"])[0]
+        expected = system.planets["Mars"].compute_orbit(compute_3D=False, dtype=np.float64)
+        np.testing.assert_allclose(orbit["x"], expected["x"])
+        np.testing.assert_allclose(orbit["y"], expected["y"])
+        assert shared.to_system().planets == system.planets
+        
+        del orbit
+        shared.close()
+
+
+def test_close_refused_while_views_are_alive():
+    system = load_system_from_csv(str(CSV))
+    
+    with publish(system, compute_3D=True) as published:
+        shared = attach(published.name)
+        orbits = shared.orbit_data()
+        
+        # Unmapping now would leave orbits pointing at freed memory
+        with pytest.raises(BufferError):
+            shared.close()
+        
+        assert np.isfinite(orbits[0]["x"]).all()
+        
+        del orbits
+        shared.close()
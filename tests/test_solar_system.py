@@ -0,0 +1,148 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from solarkit import Planet, Solar_System
+from solarkit.ephemeris import compute_positions
+
+
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+
+
+def make_planet(name, a, P):
+    return Planet(name=name, m=1, a=a, ecc=0, beta=0, R=1, trot=1, P=P)
+
+
+def assert_indexes_match(system):
+    for key in ("P", "a"):
+        values, names = system._indexes[key]
+        
+        assert len(names) == len(values) == len(system.planets)
+        assert sorted(names) == sorted(system.planets)
+        assert values == sorted(values)
+        assert values == [getattr(system.planets[name], key) for name in names]
+
+
+def test_add_keeps_indexes_in_sync():
+    system = Solar_System()
+    
+    system.add(make_planet("b0", a=2, P=3))
+    assert_indexes_match(system)
+    assert system._indexes["a"][1] == ["b0"]
+    
+    system.add(make_planet("b1", a=1, P=1))
+    system.add(make_planet("b2", a=3, P=5))
+    assert_indexes_match(system)
+    assert [planet.name for planet in system.sorted_by("a")] == ["b1", "b0", "b2"]
+
+
+def test_add_replaces_planet_with_same_name():
+    system = Solar_System()
+    system.add(make_planet("b0", a=2, P=3))
+    system.add(make_planet("b0", a=5, P=11))
+    
+    assert_indexes_match(system)
+    assert system._indexes["P"] == ([11], ["b0"])
+
+
+def test_remove_keeps_indexes_in_sync():
+    system = Solar_System()
+    for i in range(5):
+        system.add(make_planet(f"b{i}", a=i + 1, P=(i + 1) ** 1.5))
+    
+    system.remove("b2")
+    
+    assert_indexes_match(system)
+    assert "b2" not in system._indexes["a"][1]
+    
+    with pytest.raises(KeyError):
+        system.remove("b2")
+
+
+def test_extend_then_add():
+    system = Solar_System()
+    system.extend([make_planet(f"b{i}", a=10 - i, P=20 - i) for i in range(5)])
+    system.add(make_planet("new", a=7.5, P=1))
+    
+    assert_indexes_match(system)
+    assert [planet.name for planet in system.select("a", 6.5, 8, inclusive=True)] == ["b3", "new", "b2"]
+
+
+def test_indexes_not_rebuilt_after_add():
+    system = Solar_System()
+    for i in range(3):
+        system.add(make_planet(f"b{i}", a=i + 1, P=i + 1))
+    
+    indexes = system._indexes
+    system.sorted_by("P")
+    system.select("a", 1, 3)
+    
+    assert system._indexes is indexes
+
+
+def test_csv_indexes():
+    from solarkit import load_system_from_csv
+    
+    system = load_system_from_csv(str(CSV))
+    
+    assert_indexes_match(system)
+    assert len(system._indexes["P"][1]) == 9
+
+
+def test_repeat_period():
+    system = Solar_System()
+    system.extend([make_planet("b0", a=1, P=2), make_planet("b1", a=2, P=3)])
+    
+    assert system.repeat_period() == pytest.approx(6)
+    assert system.synodic_period("b0", "b1") == pytest.approx(6)
+
+
+def test_repeat_period_warns_when_pattern_does_not_close():
+    system = Solar_System()
+    system.extend([make_planet("b0", a=1, P=1), make_planet("b1", a=2, P=2 ** 0.5)])
+    
+    with pytest.warns(RuntimeWarning, match="does not close"):
+        system.repeat_period(max_periods=3)
+
+
+def brute_force_events(planets, kind, t):
+    # Every event between two samples of a fine grid, located to within one step
+    positions = compute_positions(planets=planets, t=t, compute_3D=False, dtype=np.float64)
+    longitude = np.arctan2(positions[1], positions[0])
+    events = {}
+    
+    for i in range(len(planets)):
+        for j in range(i + 1, len(planets)):
+            if kind == "closest":
+                separation = np.hypot(*(positions[:, i] - positions[:, j]))
+                k = np.flatnonzero((separation[1:-1] < separation[:-2]) & (separation[1:-1] <= separation[2:])) + 1
+            else:
+                difference = np.angle(np.exp(1j * (longitude[i] - longitude[j] - (np.pi if kind == "opposition" else 0))))
+                k = np.flatnonzero((difference[:-1] * difference[1:] < 0) & (np.abs(np.diff(difference)) < np.pi))
+            
+            events[(planets[i].name, planets[j].name)] = t[k]
+    
+    return events
+
+
+@pytest.mark.parametrize("kind", ["conjunction", "opposition", "closest"])
+def test_find_events_matches_brute_force(kind):
+    from solarkit import load_system_from_csv
+    
+    system = load_system_from_csv(str(CSV))
+    planet_names = ["Mercury", "Venus", "Earth", "Mars"]
+    t = np.linspace(0.05, 12, 400001)
+    
+    # Small blocks, so events between blocks are covered too
+    events = system.find_events(kind=kind, planet_names=planet_names, t_start=0.05, t_end=12, block_size=64)
+    expected = brute_force_events([system.planets[planet_name] for planet_name in planet_names], kind, t)
+    
+    assert events.keys() == expected.keys()
+    for pair, times in expected.items():
+        # Events closer to the ends than the coarse grid can see are not compared
+        inside = (times > 0.05 + 0.02) & (times < 12 - 0.02)
+        found = events[pair][(events[pair] > 0.05 + 0.02) & (events[pair] < 12 - 0.02)]
+        
+        assert len(found) == inside.sum() > 0, pair
+        np.testing.assert_allclose(found, times[inside], atol=3 * (t[1] - t[0]))
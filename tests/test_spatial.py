@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from solarkit import Planet, Solar_System
+from solarkit.ephemeris import compute_positions
+from solarkit.spatial import PositionIndex
+
+
+def random_system(n, seed=0):
+    rng = np.random.default_rng(seed)
+    system = Solar_System()
+    
+    for i, a in enumerate(rng.uniform(0.5, 5, n)):
+        system.add(Planet(name=f"p{i}", m=1, a=a, ecc=rng.uniform(0, 0.3), beta=rng.uniform(0, 10), R=1, trot=1, P=a**1.5,
+                          lan=rng.uniform(0, 360), argp=rng.uniform(0, 360)))
+    
+    return system
+
+
+def brute_force(planets, point, t, compute_3D, own=None):
+    positions = compute_positions(planets=planets, t=t, compute_3D=compute_3D)[..., 0].T
+    distances = np.linalg.norm(positions - point, axis=1)
+    order = [i for i in np.argsort(distances) if i != own]
+    
+    return [planets[i].name for i in order], distances[order]
+
+
+@pytest.mark.parametrize("compute_3D", [False, True])
+@pytest.mark.parametrize("t", [1.0, 1.05])
+def test_queries_match_brute_force(compute_3D, t):
+    system = random_system(300)
+    planets = list(system.planets.values())
+    index = PositionIndex.build(system, t=1.0, compute_3D=compute_3D)
+    rng = np.random.default_rng(1)
+    
+    for centre in ["p7", "p150"] + list(rng.uniform(-4, 4, (3, 3 if compute_3D else 2))):
+        own = int(centre[1:]) if isinstance(centre, str) else None
+        point = compute_positions([planets[own]], t=t, compute_3D=compute_3D)[:, 0, 0] if own is not None else centre
+        names, distances = brute_force(planets, point, t, compute_3D, own=own)
+        
+        found = index.within(centre, radius=1.5, t=t)
+        assert [planet.name for planet, _ in found] == [name for name, d in zip(names, distances) if d <= 1.5]
+        np.testing.assert_allclose([d for _, d in found], distances[distances <= 1.5])
+        
+        found = index.nearest(centre, k=10, t=t)
+        assert [planet.name for planet, _ in found] == names[:10]
+        np.testing.assert_allclose([d for _, d in found], distances[:10])
+
+
+def test_refresh_rebuilds_only_past_max_drift():
+    index = PositionIndex.build(random_system(20), t=0)
+    
+    assert index.refresh(t=1e-6, max_drift=0.1) is index
+    assert index.refresh(t=1, max_drift=0.1).t == 1
+
+
+def test_empty_results():
+    index = PositionIndex.build(random_system(20), t=0)
+    
+    assert index.within(np.full(3, 100.0), radius=0.1) == []
+    assert index.within(np.full(3, 100.0), radius=0.1, t=0.5) == []
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from solarkit import load_system_from_csv, stream
+from solarkit.ephemeris import compute_positions, iter_position_blocks
+from solarkit.stream import aiter_frames, frame_count, iter_frames
+
+
+CSV = Path(__file__).resolve().parent.parent / "planet_data.csv"
+
+
+def test_chunks_cover_every_frame():
+    planets = list(load_system_from_csv(str(CSV)).planets.values())
+    
+    chunks = list(iter_frames(planets, t_start=0.5, t_end=10.5, dt=0.01, chunk_size=300, dtype=np.float64))
+    
+    assert [chunk.index for chunk in chunks] == [0, 300, 600, 900]
+    assert sum(len(chunk) for chunk in chunks) == frame_count(0.5, 10.5, 0.01) == 1000
+    
+    t = np.concatenate([chunk.t for chunk in chunks])
+    np.testing.assert_allclose(np.concatenate([chunk.positions for chunk in chunks], axis=2), compute_positions(planets, t, compute_3D=False, dtype=np.float64))
+
+
+def test_async_frames_computed_off_the_event_loop(monkeypatch):
+    planets = list(load_system_from_csv(str(CSV)).planets.values())
+    loop_thread, block_threads = threading.get_ident(), set()
+    
+    def recording_blocks(**kwargs):
+        for block in iter_position_blocks(**kwargs):
+            block_threads.add(threading.get_ident())
+            yield block
+    
+    async def consume():
+        return [chunk async for chunk in aiter_frames(planets, t_start=0, t_end=5, dt=0.01, chunk_size=128, dtype=np.float64)]
+    
+    expected = list(iter_frames(planets, t_start=0, t_end=5, dt=0.01, chunk_size=128, dtype=np.float64))
+    monkeypatch.setattr(stream, "iter_position_blocks", recording_blocks)
+    chunks = asyncio.run(consume())
+    
+    assert block_threads and loop_thread not in block_threads
+    assert len(chunks) == len(expected)
+    for chunk, reference in zip(chunks, expected):
+        assert chunk.index == reference.index
+        np.testing.assert_array_equal(chunk.positions, reference.positions)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from solarkit import sweep
+from solarkit.sweep import load_sweep, run_angle_sweep
+
+
+T = np.linspace(0.1, 2, 50)
+
+
+def failing_chunk(t, parameters):
+    if any(P > 2 for P, _, _ in parameters):
+        raise RuntimeError("bad chunk")
+    
+    return np.zeros((len(parameters), len(t)))
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_checkpoint_saved_when_a_chunk_fails(tmp_path, workers):
+    checkpoint = str(tmp_path / "sweep.npz")
+    
+    # A negative period fails in compute_angle_vs_time
+    with pytest.raises(ValueError):
+        run_angle_sweep(t=T, P=[1, 2, -1, -2], ecc=[0.1], workers=workers, chunk_size=1, checkpoint=checkpoint, checkpoint_every=1e9)
+    
+    saved = load_sweep(checkpoint)
+    assert saved["done"][:2].all()
+    assert not saved["done"][2:].any()
+    assert np.isfinite(saved["theta"][:2]).all()
+
+
+def test_resume_from_checkpoint(tmp_path, monkeypatch):
+    checkpoint = str(tmp_path / "sweep.npz")
+    
+    monkeypatch.setattr(sweep, "_evaluate_chunk", failing_chunk)
+    with pytest.raises(RuntimeError):
+        run_angle_sweep(t=T, P=[1, 3], ecc=[0.1], workers=0, chunk_size=1, checkpoint=checkpoint)
+    monkeypatch.undo()
+    
+    result = run_angle_sweep(t=T, P=[1, 3], ecc=[0.1], workers=0, chunk_size=1, checkpoint=checkpoint)
+    
+    assert result["done"].all()
+    np.testing.assert_array_equal(result["theta"][0], 0)
+    assert np.isfinite(result["theta"][1]).all() and result["theta"][1].any()